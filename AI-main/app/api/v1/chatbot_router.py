@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException, Body, Query, Response, Request
-from typing import Optional, Dict, Any, List
+from fastapi import APIRouter, HTTPException, Body, Query, Response, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Optional, Dict, Any, List, AsyncIterator
 from pydantic import BaseModel
+import asyncio
+import json
 import logging
 
-from app.service.chat_bot_service import get_chatbot_response
+from app.service.chat_bot_service import (
+    get_chatbot_response,
+    stream_chatbot_response,
+    response_cache,
+    chat_flight,
+    conversation_store
+)
+from app.service.chatbot_pipeline import run_chatbot_pipeline, get_pipeline_metrics
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 
 class ConversationInput(BaseModel):
     input: str
-    conversationRoomNo: int = 1
+    # 없으면 대화 기록 없이 응답 (POST /api/v1/conversation-room 으로 만든 방만 기록을 사용)
+    conversationRoomNo: Optional[int] = None
 
 class RoomCreate(BaseModel):
     roomName: Optional[str] = None
@@ -24,6 +35,37 @@ class ConversationResponse(BaseModel):
     redirectionResult: Optional[Dict[str, Any]] = None
     reservationResult: Optional[Dict[str, Any]] = None
 
+# SSE 응답 헤더 (프록시 버퍼링 방지)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Server-Sent Events 한 건을 직렬화합니다."""
+    message = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
+async def sse_chatbot_stream(contents: str, room_no: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    챗봇 delta 를 SSE 이벤트로 변환합니다. 마지막에 done 이벤트를 보냅니다.
+    room_no 가 있으면 대화방 문맥을 사용하고, 완료된 응답을 대화 기록에 저장합니다.
+    """
+    history = await asyncio.to_thread(conversation_store.build_context, room_no) if room_no is not None else None
+    parts = []
+    try:
+        async for delta in stream_chatbot_response(contents, history=history):
+            parts.append(delta)
+            yield format_sse({"delta": delta})
+    except Exception as e:
+        logger.error(f"챗봇 스트리밍 오류: {str(e)}", exc_info=True)
+        yield format_sse({"message": "챗봇 응답을 처리하는 중 오류가 발생했습니다."}, event="error")
+    if room_no is not None and parts:
+        await asyncio.to_thread(conversation_store.append_exchange, room_no, contents, "".join(parts))
+    yield format_sse({}, event="done")
+
 # APIRouter 인스턴스 생성
 router = APIRouter(
     prefix="",  # 접두사 없음
@@ -32,13 +74,14 @@ router = APIRouter(
 
 # 대화방 마지막 대화 시간 API
 @router.get("/api/v1/conversation-room/last-conversation-time")
-async def last_conversation_time():
+async def last_conversation_time(userId: Optional[int] = Query(None)):
     """
     프론트엔드가 요청하는 마지막 대화 시간 엔드포인트
     """
+    last_time = await asyncio.to_thread(conversation_store.last_conversation_time, userId)
     return {
         "status": "success", 
-        "last_time": "2025-05-24T09:00:00"
+        "last_time": last_time
     }
 
 # 대화방 정보 API
@@ -47,10 +90,12 @@ async def get_conversation_room(room_id: int):
     """
     대화방 정보를 반환하는 API
     """
+    room = await asyncio.to_thread(conversation_store.get_room, room_id)
+    if room is None:
+        raise HTTPException(status_code=404, detail=f"대화방을 찾을 수 없습니다: {room_id}")
     return {
         "status": "success",
-        "conversationRoomNo": room_id,
-        "created_at": "2025-05-24T09:00:00"
+        **room
     }
 
 # 대화방 생성 API - 수정: Body의 기본값 처리 개선
@@ -59,9 +104,10 @@ async def create_conversation_room(data: RoomCreate = Body(default_factory=RoomC
     """
     대화방 생성 API
     """
+    room = await asyncio.to_thread(conversation_store.create_room, data.roomName, data.userId)
     return {
         "status": "success",
-        "conversationRoomNo": 1
+        "conversationRoomNo": room["conversationRoomNo"]
     }
 
 # 대화 처리 API
@@ -78,8 +124,11 @@ async def process_conversation(data: ConversationInput, request: Request):
         input_text = data.input
         room_no = data.conversationRoomNo
         
-        # 챗봇 응답 생성
-        response_text = get_chatbot_response(input_text)
+        # 대화방 문맥(요약 + 최근 대화)으로 챗봇 응답 생성
+        history = await asyncio.to_thread(conversation_store.build_context, room_no) if room_no is not None else None
+        response_text = await get_chatbot_response(input_text, history=history)
+        if room_no is not None:
+            await asyncio.to_thread(conversation_store.append_exchange, room_no, input_text, response_text)
         
         # 응답 구성
         return ConversationResponse(
@@ -94,33 +143,114 @@ async def process_conversation(data: ConversationInput, request: Request):
         logger.error(f"대화 처리 오류: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-# 챗봇 응답 API - CORS 처리 개선
-@router.get("/api/v1/chatbot/chatting")
-async def chatbot_response(contents: str = Query(...), request: Request = None):
+# 대화 처리 스트리밍 API (SSE)
+@router.post("/api/v1/conversation/stream")
+async def process_conversation_stream(data: ConversationInput, request: Request):
     """
-    챗봇 응답 API
+    대화 처리 API - 응답을 토큰 단위 SSE 로 전송
     """
-    try:
-        # 요청 로깅
+    client_host = request.client.host if request.client else "unknown"
+    logger.info(f"대화 스트리밍 API 호출 - 클라이언트: {client_host}, 입력: {data.input}")
+    return StreamingResponse(
+        sse_chatbot_stream(data.input, room_no=data.conversationRoomNo),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+# 챗봇 채팅 경로들 - 모두 같은 파이프라인을 공유
+CHATTING_PATHS = (
+    "/api/v1/chatbot/chatting",
+    "/api/v1/chatbot/chatting-direct",
+    "/api/v1/chatbot/chatting-backup",
+)
+
+def make_chatting_endpoint(path: str):
+    async def chatbot_response(contents: str = Query(...), request: Request = None):
+        """
+        챗봇 응답 API
+        """
         client_host = request.client.host if request and request.client else "unknown"
-        logger.info(f"챗봇 API 호출 - 클라이언트: {client_host}, 입력: {contents}")
-        
-        response = get_chatbot_response(contents)
-        logger.info(f"챗봇 응답: {response[:100]}...")
-        
-        return {"response": response}
-    except Exception as e:
-        logger.error(f"챗봇 응답 오류: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail={
-            "error": "Internal Server Error",
-            "message": "챗봇 응답을 처리하는 중 오류가 발생했습니다.",
-            "details": str(e)
-        })
-
-# OPTIONS 요청 처리를 위한 추가 엔드포인트
-@router.options("/api/v1/chatbot/chatting")
+        try:
+            response = await run_chatbot_pipeline(path, contents, client_host)
+            return {"response": response}
+        except Exception as e:
+            logger.error("챗봇 응답 오류 [%s]: %s", path, e, exc_info=True)
+            # 기존 클라이언트 호환: 오류도 200 + error 필드로 응답
+            return {"error": str(e), "response": "죄송합니다. 현재 서비스에 문제가 있습니다."}
+    return chatbot_response
+
 async def chatbot_options():
     """
     CORS preflight 요청 처리
     """
     return {"message": "OK"}
+
+for _path in CHATTING_PATHS:
+    _name = _path.rsplit("/", 1)[-1].replace("-", "_")
+    router.add_api_route(_path, make_chatting_endpoint(_path), methods=["GET"], name=_name)
+    router.add_api_route(_path, chatbot_options, methods=["OPTIONS"], name=f"{_name}_options")
+
+# 챗봇 파이프라인 경로별 지표 API
+@router.get("/api/v1/chatbot/metrics")
+async def chatbot_metrics():
+    """
+    채팅 경로별 호출 수, 오류 수, 평균/최대 지연 시간
+    """
+    return {"status": "success", "paths": get_pipeline_metrics()}
+
+# 응답 캐시 통계 API
+@router.get("/api/v1/chatbot/cache-stats")
+async def chatbot_cache_stats():
+    """
+    응답 캐시 적중/미스 카운터와 요청 병합(single-flight) 카운터
+    """
+    return {
+        "status": "success",
+        "cache": response_cache.stats(),
+        "single_flight": chat_flight.stats()
+    }
+
+# 챗봇 스트리밍 응답 API (SSE)
+@router.get("/api/v1/chatbot/chatting-stream")
+async def chatbot_response_stream(contents: str = Query(...), request: Request = None):
+    """
+    챗봇 응답 API - 응답을 토큰 단위 SSE 로 전송
+    """
+    client_host = request.client.host if request and request.client else "unknown"
+    logger.info(f"챗봇 스트리밍 API 호출 - 클라이언트: {client_host}, 입력: {contents}")
+    return StreamingResponse(
+        sse_chatbot_stream(contents),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+# 챗봇 스트리밍 응답 API (WebSocket)
+@router.websocket("/api/v1/chatbot/ws")
+async def chatbot_websocket(websocket: WebSocket):
+    """
+    챗봇 WebSocket API
+    요청: 텍스트 또는 {"contents": "..."}
+    응답: {"type": "delta", "content": "..."} 반복 후 {"type": "done"}
+    """
+    await websocket.accept()
+    client_host = websocket.client.host if websocket.client else "unknown"
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                contents = json.loads(message).get("contents", "")
+            except (ValueError, AttributeError):
+                contents = message
+            logger.info(f"챗봇 WebSocket 호출 - 클라이언트: {client_host}, 입력: {contents}")
+
+            try:
+                async for delta in stream_chatbot_response(contents):
+                    await websocket.send_json({"type": "delta", "content": delta})
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                logger.error(f"챗봇 WebSocket 응답 오류: {str(e)}", exc_info=True)
+                await websocket.send_json({"type": "error", "message": "챗봇 응답을 처리하는 중 오류가 발생했습니다."})
+            await websocket.send_json({"type": "done"})
+    except WebSocketDisconnect:
+        logger.info(f"챗봇 WebSocket 연결 종료 - 클라이언트: {client_host}")
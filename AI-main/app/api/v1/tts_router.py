@@ -1,8 +1,16 @@
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
 from app.core import logger
-from app.service.melo_tts_service import convert_text_to_speech
+from app.service.melo_tts_service import (
+    get_cached_audio,
+    stream_text_to_speech_async,
+    tts_audio_cache,
+    model,
+    tts_executor,
+    warm_audio_bank,
+)
+from app.service.tts_executor import TTSQueueFullError
 from app.service.openai_tts_service import convert_text_to_speech_openai
 
 router = APIRouter(
@@ -13,12 +21,42 @@ router = APIRouter(
 @router.get("/melo")
 async def melo_tts(contents: str):
     logger.info(f"📌 input contents: \"{contents}\"")
-    buffer = convert_text_to_speech(contents)
-    return StreamingResponse(buffer, media_type="audio/wav")
+    # 시작 시 미리 합성해 둔 고정 문구/시간 응답
+    warm_audio = warm_audio_bank.get(contents)
+    if warm_audio is not None:
+        return Response(content=warm_audio, media_type="audio/wav")
+
+    # 같은 문장은 다시 합성하지 않음 (메모리 적중은 바로, 디스크 적중은 파일 그대로 전송)
+    cache_key, cached_bytes, cached_path = get_cached_audio(contents)
+    if cached_bytes is not None:
+        return Response(content=cached_bytes, media_type="audio/wav")
+    if cached_path is not None:
+        return FileResponse(cached_path, media_type="audio/wav")
+
+    try:
+        # 전용 워커 풀에서 문장별로 합성되는 즉시 전송
+        audio_stream = stream_text_to_speech_async(contents, cache_key)
+    except TTSQueueFullError as e:
+        logger.warning(f"⚠️ TTS 대기열 초과 - {e.retry_after}초 후 재시도 안내")
+        raise HTTPException(
+            status_code=429,
+            detail="음성 합성 요청이 많습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return StreamingResponse(audio_stream, media_type="audio/wav")
     
 @router.get("/openai")
 async def openai_tts(contents: str):
     logger.info(f"📌 input contents: \"{contents}\"")
     buffer = convert_text_to_speech_openai(contents)
     return StreamingResponse(buffer, media_type="audio/wav")
-    
\ No newline at end of file
+
+@router.get("/stats")
+async def tts_stats():
+    """합성 워커 풀과 합성 결과 캐시 상태"""
+    return {
+        "executor": tts_executor.stats(),
+        "audio_cache": tts_audio_cache.stats() if tts_audio_cache is not None else None,
+        "warm_bank": warm_audio_bank.stats(),
+        "feature_cache": model.feature_cache.stats() if model.feature_cache is not None else None,
+    }
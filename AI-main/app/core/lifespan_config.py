@@ -1,7 +1,43 @@
+import asyncio
+import logging
+import threading
+
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
+from app.core.setting import settings
+from app.service.chat_bot_service import init_http_client, close_http_client, conversation_store, get_offline_phrases
+
+logger = logging.getLogger("app")
+
+
+def _warm_tts_audio_bank(stop_event: threading.Event) -> None:
+    # 모델 로드가 포함되므로 워커 스레드에서 실행, 모델 파일이 없으면 건너뜀
+    try:
+        from app.service.melo_tts_service import warm_audio_bank
+    except Exception as e:
+        logger.warning(f"⚠️ TTS 사전 합성 건너뜀 (모델 로드 실패): {str(e)}")
+        return
+    warm_audio_bank.warm(get_offline_phrases(), stop_event=stop_event)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # OpenAI 호출용 커넥션 풀을 워커 수명 동안 하나만 유지
+    await init_http_client()
+    # 대화 기록 저장소 (SQLite WAL)
+    conversation_store.open()
+    # 오프라인 고정 문구 음성은 서버 기동을 막지 않도록 백그라운드에서 합성 (TTS 라우터가 켜졌을 때만)
+    warm_stop = threading.Event()
+    warm_task = None
+    if settings.tts_enabled and settings.tts_warm_bank_enabled:
+        warm_task = asyncio.create_task(asyncio.to_thread(_warm_tts_audio_bank, warm_stop))
 
     yield
+
+    # 워커 스레드는 취소되지 않으므로 문구 사이에서 멈추도록 신호
+    warm_stop.set()
+    if warm_task is not None and not warm_task.done():
+        warm_task.cancel()
+    conversation_store.close()
+    await close_http_client()
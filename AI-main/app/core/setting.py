@@ -27,6 +27,73 @@ class Settings(BaseSettings):
     default_model: str = os.getenv("DEFAULT_MODEL", "gpt-4o-mini")
     system_prompt: str = os.getenv("SYSTEM_PROMPT", "당신은 '금복이'이라는 이름의 노인분들을 위한 친절한 AI 도우미입니다. 음성으로 소비내역을 말하면 자동으로 가계부에 기록해드리고, 간단명료하게 대답해주세요.")
     
+    # OpenAI HTTP 클라이언트 (선택적)
+    openai_timeout: float = float(os.getenv("OPENAI_TIMEOUT", "30"))
+    openai_max_connections: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+    openai_max_keepalive: int = int(os.getenv("OPENAI_MAX_KEEPALIVE", "50"))
+    openai_keepalive_expiry: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+    
+    # 챗봇 응답 캐시 (선택적)
+    response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+    response_cache_max_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+    response_cache_similarity: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.85"))
+    
+    # 대화 기록 저장소 (선택적)
+    conversation_db_path: str = os.getenv("CONVERSATION_DB_PATH", "")
+    conversation_max_rooms: int = int(os.getenv("CONVERSATION_MAX_ROOMS", "256"))
+    conversation_window_turns: int = int(os.getenv("CONVERSATION_WINDOW_TURNS", "12"))
+    conversation_token_budget: int = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500"))
+    
+    # TTS 라우터 사용 여부 (선택적, 모델 파일이 있을 때만 켬 - 끄면 TTS 모델을 로드하지 않음)
+    tts_enabled: bool = os.getenv("TTS_ENABLED", "False").lower() in ("true", "1", "yes")
+    
+    # Melo TTS weight norm 접기 + 접힌 가중치 디스크 캐시 (선택적)
+    tts_optimize: bool = os.getenv("TTS_OPTIMIZE", "True").lower() in ("true", "1", "yes")
+    
+    # Melo TTS 추론 정밀도 (fp32 / int8 / bf16)
+    tts_precision: str = os.getenv("TTS_PRECISION", "fp32")
+    # fp32 대비 허용 멜 거리 (시작 시 확인, 넘으면 fp32 로 유지)
+    tts_precision_max_mel_distance: float = float(os.getenv("TTS_PRECISION_MAX_MEL_DISTANCE", "0.2"))
+    
+    # Melo TTS 그래프 컴파일 (선택적, "" / script)
+    tts_compile: str = os.getenv("TTS_COMPILE", "")
+    
+    # Melo TTS 샘플링 시드 (선택적, -1 이면 매번 무작위, 고정하면 같은 문장은 항상 같은 음성)
+    # 주의: SDP(확률적 길이 예측)를 쓰는 설정(SDP_RATIO > 0, NOISE_SCALE_W > 0)에서 시드를 고정하면
+    # 인코더/길이 예측은 TTS_COMPILE 그래프나 ONNX 대신 eager 로 실행됨 (처음 한 번 경고 로그)
+    tts_seed: int = int(os.getenv("TTS_SEED", "-1"))
+    
+    # Melo TTS 분할 디코딩 (선택적, 0 이면 문장 단위 디코딩)
+    tts_max_chunk_frames: int = int(os.getenv("TTS_MAX_CHUNK_FRAMES", "0"))
+    
+    # Melo TTS 마이크로 배칭 (선택적, 최대 배치 1 이면 비활성)
+    tts_max_batch_size: int = int(os.getenv("TTS_MAX_BATCH_SIZE", "8"))
+    tts_max_batch_wait_ms: float = float(os.getenv("TTS_MAX_BATCH_WAIT_MS", "10"))
+    
+    # TTS 합성 워커 풀 (선택적, 스레드 수 0 이면 torch 기본값)
+    tts_workers: int = int(os.getenv("TTS_WORKERS", "2"))
+    tts_max_queue: int = int(os.getenv("TTS_MAX_QUEUE", "8"))
+    tts_torch_threads: int = int(os.getenv("TTS_TORCH_THREADS", "0"))
+    
+    # TTS 합성 결과 캐시 (선택적)
+    tts_cache_enabled: bool = os.getenv("TTS_CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+    tts_cache_memory_bytes: int = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+    tts_cache_disk_bytes: int = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+    
+    # TTS 문장별 G2P/BERT 특징 캐시 (선택적, 항목 수 0 이면 비활성)
+    tts_feature_cache_entries: int = int(os.getenv("TTS_FEATURE_CACHE_ENTRIES", "4096"))
+    tts_feature_cache_disk_bytes: int = int(os.getenv("TTS_FEATURE_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+    
+    # TTS 문장별 인코더/길이 예측 결과 캐시 (선택적, 기본 비활성 - 항목 수 0)
+    # 시드를 고정했거나 SDP 를 쓰지 않는 호출만 캐시 (시드 없는 SDP 샘플링은 매번 새로 뽑음)
+    # 마이크로 배칭(TTS_MAX_BATCH_SIZE > 1)은 이 캐시를 거치지 않으므로 TTS_MAX_BATCH_SIZE=1 과 함께 사용
+    tts_encoder_cache_entries: int = int(os.getenv("TTS_ENCODER_CACHE_ENTRIES", "0"))
+    
+    # 시작 시 오프라인 고정 문구 TTS 사전 합성 (선택적, TTS_ENABLED 일 때만)
+    tts_warm_bank_enabled: bool = os.getenv("TTS_WARM_BANK_ENABLED", "True").lower() in ("true", "1", "yes")
+    
     # 외부 서비스 (선택적)
     backend_api_url: str = os.getenv("BACKEND_API_URL", "http://localhost:9090/api/v1")
     
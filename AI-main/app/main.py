@@ -1,8 +1,10 @@
 import logging
-from fastapi import FastAPI, Query, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from app.core.setting import settings
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -48,25 +50,25 @@ app.add_middleware(
     expose_headers=["Content-Type", "Authorization"]
 )
 
-# 챗봇 서비스 함수 직접 임포트 (전역에서)
+# 챗봇 서비스 로드 확인 (채팅 경로들은 chatbot_router 에서 등록)
 try:
-    from app.service.chat_bot_service import get_chatbot_response
+    from app.service import chat_bot_service  # noqa: F401
     logger.info("✅ 챗봇 서비스 로드 성공")
     chatbot_service_available = True
 except Exception as e:
     logger.error(f"❌ 챗봇 서비스 로드 실패: {str(e)}")
     chatbot_service_available = False
-    def get_chatbot_response(text):
-        return f"챗봇 서비스 로드 실패: {text}에 대한 응답을 처리할 수 없습니다."
 
 # 라우터 등록 시도
 def register_routers():
     """라우터들을 안전하게 등록"""
     routers_to_register = [
         ("app.api.v1.chatbot_router", "챗봇"),
-        # ("app.api.v1.tts_router", "TTS"),  # TTS 모델 파일 없어서 임시 비활성화
         ("app.api.v1.etc_router", "기타")
     ]
+    # TTS 모델 파일이 있을 때만 TTS_ENABLED 로 켬
+    if settings.tts_enabled:
+        routers_to_register.append(("app.api.v1.tts_router", "TTS"))
     
     for module_path, name in routers_to_register:
         try:
@@ -94,65 +96,6 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "donghang-ai"}
 
-# 프론트엔드에서 요청하는 모든 챗봇 엔드포인트들을 직접 등록
-@app.get("/api/v1/chatbot/chatting")
-async def chatbot_main(contents: str = Query(...), request: Request = None):
-    """메인 챗봇 엔드포인트"""
-    try:
-        client_host = request.client.host if request and request.client else "unknown"
-        logger.info(f"[MAIN] 챗봇 API 호출 - 클라이언트: {client_host}, 입력: {contents}")
-        
-        response = get_chatbot_response(contents)
-        logger.info(f"[MAIN] 챗봇 응답: {response[:100]}...")
-        
-        return {"response": response}
-    except Exception as e:
-        logger.error(f"[MAIN] 챗봇 응답 오류: {str(e)}")
-        return {"error": str(e), "response": "죄송합니다. 현재 서비스에 문제가 있습니다."}
-
-@app.get("/api/v1/chatbot/chatting-direct")
-async def chatbot_direct(contents: str = Query(...), request: Request = None):
-    """직접 챗봇 엔드포인트"""
-    try:
-        client_host = request.client.host if request and request.client else "unknown"
-        logger.info(f"[DIRECT] 챗봇 API 호출 - 클라이언트: {client_host}, 입력: {contents}")
-        
-        response = get_chatbot_response(contents)
-        logger.info(f"[DIRECT] 챗봇 응답: {response[:100]}...")
-        
-        return {"response": response}
-    except Exception as e:
-        logger.error(f"[DIRECT] 챗봇 응답 오류: {str(e)}")
-        return {"error": str(e), "response": "죄송합니다. 현재 서비스에 문제가 있습니다."}
-
-@app.get("/api/v1/chatbot/chatting-backup")
-async def chatbot_backup(contents: str = Query(...), request: Request = None):
-    """백업 챗봇 엔드포인트"""
-    try:
-        client_host = request.client.host if request and request.client else "unknown"
-        logger.info(f"[BACKUP] 챗봇 API 호출 - 클라이언트: {client_host}, 입력: {contents}")
-        
-        response = get_chatbot_response(contents)
-        logger.info(f"[BACKUP] 챗봇 응답: {response[:100]}...")
-        
-        return {"response": response}
-    except Exception as e:
-        logger.error(f"[BACKUP] 챗봇 응답 오류: {str(e)}")
-        return {"error": str(e), "response": "죄송합니다. 현재 서비스에 문제가 있습니다."}
-
-# OPTIONS 요청 처리
-@app.options("/api/v1/chatbot/chatting")
-async def chatbot_options():
-    return {"message": "OK"}
-
-@app.options("/api/v1/chatbot/chatting-direct")
-async def chatbot_direct_options():
-    return {"message": "OK"}
-
-@app.options("/api/v1/chatbot/chatting-backup")
-async def chatbot_backup_options():
-    return {"message": "OK"}
-
 # 디버깅을 위한 라우트 정보 출력
 @app.get("/debug/routes")
 async def debug_routes():
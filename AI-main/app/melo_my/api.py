@@ -1,22 +1,34 @@
+import glob
+import logging
+import os
 import re
+from concurrent.futures import Future
+
 import torch
 import torch.nn as nn
 import soundfile
 import numpy as np
 from tqdm import tqdm
 
-from .utils import get_text_for_tts_infer
+from .utils import get_text_for_tts_infer, get_text_for_tts_infer_batch
 from .models import SynthesizerTrn
 from .split_utils import split_sentence
+from .scheduler import InferenceScheduler
+from .feature_cache import EncoderOutputCache, TextFeatureCache
+from .precision import apply_precision, compare_precision, precision_context
+from .export import CompiledInference, samples_durations
 from .download_utils import load_or_download_config, load_or_download_model
 
+logger = logging.getLogger(__name__)
+
 class TTS(nn.Module):
     def __init__(self, 
                 language,
                 device='cpu',
                 use_hf=True,
                 config_path=None,
-                ckpt_path=None):
+                ckpt_path=None,
+                optimize=False):
         
         super().__init__()
 
@@ -25,6 +37,27 @@ class TTS(nn.Module):
 
         hps = load_or_download_config(language, use_hf=use_hf, config_path=config_path)
 
+        self.symbol_to_id = {s: i for i, s in enumerate(hps.symbols)}
+        self.hps = hps
+        self.device = device
+        self.language = language.split('_')[0]
+        # kept to reload fp32 weights (check_precision after set_precision)
+        self._load_args = (language, use_hf, ckpt_path, optimize)
+        self.model = self._load_synthesizer(*self._load_args)
+        self.ckpt_path = ckpt_path
+        # alternative .infer() runner (CompiledInference, OnnxInference); kept
+        # out of the nn.Module registry so it is never a second copy in state_dict
+        self._runner = None
+        self.scheduler = None
+        self.feature_cache = None
+        self.bert_precision = "fp32"
+        self.encoder_cache = None
+        self.max_chunk_frames = None
+        self.chunk_overlap_frames = 4
+
+    def _load_synthesizer(self, language, use_hf, ckpt_path, optimize):
+        """Build the SynthesizerTrn for self.hps and load its fp32 weights (weight norm folded with ``optimize``)."""
+        hps, device = self.hps, self.device
         model = SynthesizerTrn(
             len(hps.symbols),
             hps.data.filter_length // 2 + 1,
@@ -36,55 +69,190 @@ class TTS(nn.Module):
         ).to(device)
 
         model.eval()
-        self.model = model
-        self.symbol_to_id = {s: i for i, s in enumerate(hps.symbols)}
-        self.hps = hps
-        self.device = device
-        self.language = language.split('_')[0]
     
         # load state_dict
-        checkpoint_dict = load_or_download_model(language, device, use_hf=use_hf, ckpt_path=ckpt_path)
-        self.model.load_state_dict(checkpoint_dict['model'], strict=True)
+        folded_path = self.folded_checkpoint_path(ckpt_path) if optimize else None
+        if folded_path is not None and os.path.exists(folded_path):
+            # weight norm already folded: build the flat structure and load it directly
+            model.optimize_for_inference()
+            model.load_state_dict(torch.load(folded_path, map_location=device), strict=True)
+        else:
+            checkpoint_dict = load_or_download_model(language, device, use_hf=use_hf, ckpt_path=ckpt_path)
+            model.load_state_dict(checkpoint_dict['model'], strict=True)
+            if optimize:
+                model.optimize_for_inference()
+                if folded_path is not None:
+                    torch.save(model.state_dict(), folded_path)
+                    self.prune_folded_checkpoints(ckpt_path, keep=folded_path)
+        return model
 
-    def tts_to_file(self, text, speaker_id, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, format=None, quiet=False,):
-        language = self.language
-        device = self.device
-        texts = self.split_sentences_into_pieces(text, language, quiet)
-        audio_list = []
+    @property
+    def runner(self):
+        """Object whose .infer() runs the synthesizer: the model itself unless replaced."""
+        return self._runner if self._runner is not None else self.model
+
+    @staticmethod
+    def folded_checkpoint_path(ckpt_path):
+        """Disk cache for the weight-norm-folded state_dict, tied to the checkpoint's size and mtime."""
+        if ckpt_path is None or not os.path.exists(ckpt_path):
+            return None
+        stat = os.stat(ckpt_path)
+        root, _ = os.path.splitext(ckpt_path)
+        return f"{root}.folded-{stat.st_size:x}-{stat.st_mtime_ns:x}.pt"
+
+    @staticmethod
+    def prune_folded_checkpoints(ckpt_path, keep=None):
+        """Delete folded state_dicts left over from earlier versions of the checkpoint."""
+        root, _ = os.path.splitext(ckpt_path)
+        for path in glob.glob(f"{glob.escape(root)}.folded-*.pt"):
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def set_precision(self, mode="fp32", bert=True):
+        """
+        Apply a precision mode at load time: fp32, int8 (dynamic quantization of
+        TextEncoder, the flow and BERT) or bf16 (autocast, where the CPU supports it).
+        """
+        mode = apply_precision(self.model, mode)
+        if bert and not getattr(self.hps.data, "disable_bert", False):
+            from .text import korean
+            self.bert_precision = korean.set_bert_precision(mode)
+            if self.feature_cache is not None:
+                self.feature_cache.precision = self.bert_precision
+        return mode
+
+    def check_precision(self, text, speaker_id, mode, bert=True):
+        """
+        Mel distance of ``mode`` against fp32 on one sentence (deterministic
+        settings) plus the measured speedup of the synthesizer. The reference
+        is always an fp32 synthesizer (fp32 weights are reloaded when this
+        model already runs under another mode) with fp32 BERT features; with
+        ``bert`` the candidate's BERT features are computed under ``mode``.
+        BERT precision is switched process-wide during the check, so do not
+        run it while serving requests.
+        """
+        if getattr(self.model, "precision", "fp32") == "fp32":
+            reference = self.model
+        else:
+            reference = self._load_synthesizer(*self._load_args)
+        use_bert = not getattr(self.hps.data, "disable_bert", False)
+        reference_args = self._infer_args(self._uncached_text_features(text, "fp32" if use_bert else None), speaker_id)
+        candidate_args = reference_args
+        if bert and use_bert:
+            candidate_args = self._infer_args(self._uncached_text_features(text, mode), speaker_id)
+        return compare_precision(
+            reference, reference_args, mode, self.hps.data.sampling_rate,
+            candidate_args=candidate_args,
+            noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0,
+        )
+
+    def set_checked_precision(self, mode, text, speaker_id, max_mel_distance):
+        """
+        set_precision(mode) only when check_precision on ``text`` stays within
+        ``max_mel_distance`` of fp32; otherwise the model stays fp32 (logged).
+        Returns (applied mode, check result). Call before serving.
+        """
+        result = self.check_precision(text, speaker_id, mode)
+        if result["mel_distance"] > max_mel_distance:
+            logger.warning(
+                "%s inference is too far from fp32 (mel distance %.4f > %.4f), staying on fp32",
+                result["mode"], result["mel_distance"], max_mel_distance,
+            )
+            return "fp32", result
+        logger.info(
+            "%s inference: mel distance %.4f, %.2fx speedup", result["mode"], result["mel_distance"], result["speedup"]
+        )
+        return self.set_precision(mode), result
+
+    def enable_feature_cache(self, max_entries=4096, directory=None, disk_max_bytes=256 * 1024 * 1024):
+        """Cache G2P + BERT front-end output per sentence (memory LRU, optional disk tier)."""
+        self.feature_cache = TextFeatureCache(
+            max_entries=max_entries, directory=directory, disk_max_bytes=disk_max_bytes, precision=self.bert_precision
+        )
+        return self.feature_cache
+
+    def enable_encoder_cache(self, max_entries=256):
+        """
+        Keep each sentence's encode() output (text encoder + durations) so
+        rendering it again at another speed or noise scale, e.g. for slow
+        speech, only runs the flow and decoder. Only used for calls whose
+        durations are reproducible: seeded, or without stochastic-duration
+        noise (sdp_ratio or noise_scale_w 0); unseeded SDP sampling is never
+        cached, so it stays random per call.
+        The micro-batching scheduler runs whole sentences and bypasses this
+        cache, so only unbatched and chunked synthesis use it.
+        """
+        self.encoder_cache = EncoderOutputCache(max_entries=max_entries)
+        self._warn_encoder_cache_bypass()
+        return self.encoder_cache
+
+    def _warn_encoder_cache_bypass(self):
+        if self.encoder_cache is not None and self.scheduler is not None:
+            logger.warning(
+                "Encoder cache is not used by the batching scheduler; disable batching "
+                "(max_batch_size 1) for sentences to hit it"
+            )
+
+    def enable_compiled_inference(self, backend="script", cache_dir=None, warmup=True, **bucket_kwargs):
+        """
+        Run single-sentence inference through per-length-bucket TorchScript
+        (``script``) graphs. Call after set_precision; traced graphs are cached
+        in ``cache_dir`` per checkpoint, precision mode and code version and
+        loaded on the next start.
+        """
+        precision = getattr(self.model, "precision", "fp32")
+        folded = self.folded_checkpoint_path(self.ckpt_path)
+        cache_key = os.path.basename(os.path.splitext(folded)[0]) if folded else "model"
+        if getattr(self.model, "inference_optimized", False):
+            cache_key += "-opt"
+        self._runner = CompiledInference(
+            self.model, backend=backend, cache_dir=cache_dir, cache_key=f"{cache_key}-{precision}", **bucket_kwargs
+        )
+        if warmup:
+            self.runner.warmup()
+        if self.scheduler is not None:
+            self.enable_batching(self.scheduler.max_batch_size, self.scheduler.max_wait * 1000)
+        return self.runner
+
+    def enable_chunked_decoding(self, max_chunk_frames=128, overlap_frames=4):
+        """
+        Decode long sentences in chunks of at most ``max_chunk_frames`` latent
+        frames: tts_iter yields audio per chunk and decoder memory stays
+        bounded. Chunked sentences bypass the batching scheduler.
+        """
+        self.max_chunk_frames = max_chunk_frames
+        self.chunk_overlap_frames = overlap_frames
+
+    def enable_batching(self, max_batch_size=8, max_wait_ms=5.0):
+        """Route sentence inference through a shared micro-batching scheduler."""
+        self.disable_batching()
+        self.scheduler = InferenceScheduler(
+            self.runner, device=self.device, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+        self._warn_encoder_cache_bypass()
+        return self.scheduler
+
+    def disable_batching(self):
+        if self.scheduler is not None:
+            self.scheduler.close()
+            self.scheduler = None
+
+    def tts_to_file(self, text, speaker_id, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, format=None, quiet=False, seed=None):
+        texts = self.split_sentences_into_pieces(text, self.language, quiet)
 
         # tx = texts if quiet else tqdm(texts)
         tx = texts if quiet else texts
 
-        for t in tx:
-            if language in ['EN', 'ZH_MIX_EN']:
-                t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
-            bert, ja_bert, phones, tones, lang_ids = get_text_for_tts_infer(t, language, self.hps, device, self.symbol_to_id)
-
-            with torch.no_grad():
-                x_tst = phones.to(device).unsqueeze(0)
-                tones = tones.to(device).unsqueeze(0)
-                lang_ids = lang_ids.to(device).unsqueeze(0)
-                bert = bert.to(device).unsqueeze(0)
-                ja_bert = ja_bert.to(device).unsqueeze(0)
-                x_tst_lengths = torch.LongTensor([phones.size(0)]).to(device)
-                del phones
-                speakers = torch.LongTensor([speaker_id]).to(device)
-                audio = self.model.infer(
-                        x_tst,
-                        x_tst_lengths,
-                        speakers,
-                        tones,
-                        lang_ids,
-                        bert,
-                        ja_bert,
-                        sdp_ratio=sdp_ratio,
-                        noise_scale=noise_scale,
-                        noise_scale_w=noise_scale_w,
-                        length_scale=1. / speed,
-                    )[0][0, 0].data.cpu().float().numpy()
-                del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers
-                
-            audio_list.append(audio)
+        # BERT runs once for the whole request; with batching enabled every
+        # sentence is queued before waiting on any of them
+        futures = [
+            self._synthesize(features, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed, seed)
+            for features in self._text_features_batch(tx)
+        ]
+        audio_list = [future.result() for future in futures]
         torch.cuda.empty_cache()
         audio = self.audio_numpy_concat(audio_list, sr=self.hps.data.sampling_rate, speed=speed)
 
@@ -96,6 +264,168 @@ class TTS(nn.Module):
             else:
                 soundfile.write(output_path, audio, self.hps.data.sampling_rate)
 
+    def tts_iter(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, quiet=False, cancel_event=None, seed=None):
+        """
+        Yield float32 audio sentence by sentence, each followed by the same
+        inter-sentence silence audio_numpy_concat inserts. Concatenating the
+        chunks gives the tts_to_file output. Setting cancel_event (a
+        threading.Event) stops synthesis before the next sentence.
+        With chunked decoding enabled, long sentences are yielded decoder
+        chunk by decoder chunk instead (cancel_event is checked per chunk).
+        With ``seed`` every sentence is sampled from a generator seeded with
+        it, so the same sentence always gives the same audio.
+        BERT runs on the first sentence alone, so the first audio is not held
+        up by the rest of the text, then once over the remaining sentences.
+        """
+        texts = self.split_sentences_into_pieces(text, self.language, quiet)
+        silence = np.zeros(int((self.hps.data.sampling_rate * 0.05) / speed), dtype=np.float32)
+
+        if self.max_chunk_frames:
+            for features in self._iter_text_features(texts):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                for audio in self._synthesize_chunks(
+                    features, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed, seed
+                ):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    yield audio
+                yield silence
+            return
+
+        pending = []
+        try:
+            for i, features in enumerate(self._iter_text_features(texts)):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                pending.append(
+                    self._synthesize(features, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed, seed)
+                )
+                # the first sentence is yielded before BERT runs on the rest; after
+                # that, with batching, the next sentence is queued before waiting on the current one
+                if self.scheduler is None or i == 0 or len(pending) > 1:
+                    yield np.concatenate([pending.pop(0).result().reshape(-1), silence])
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield np.concatenate([pending.pop(0).result().reshape(-1), silence])
+        finally:
+            # drop queued sentences nobody will read
+            for future in pending:
+                future.cancel()
+
+    def _iter_text_features(self, texts):
+        """Features for the first sentence, then one BERT batch for the rest (computed when first needed)."""
+        if not texts:
+            return
+        yield self._text_features(texts[0])
+        if len(texts) > 1:
+            yield from self._text_features_batch(texts[1:])
+
+    def _text_features(self, t):
+        if self.language in ['EN', 'ZH_MIX_EN']:
+            t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
+        return get_text_for_tts_infer(t, self.language, self.hps, self.device, self.symbol_to_id, feature_cache=self.feature_cache)
+
+    def _uncached_text_features(self, t, bert_precision=None):
+        """Front-end features without the feature cache, with BERT under ``bert_precision`` if given."""
+        if bert_precision is None:
+            return get_text_for_tts_infer(t, self.language, self.hps, self.device, self.symbol_to_id)
+        from .text import korean
+        with korean.use_bert_precision(bert_precision):
+            return get_text_for_tts_infer(t, self.language, self.hps, self.device, self.symbol_to_id)
+
+    def _text_features_batch(self, texts):
+        if self.language in ['EN', 'ZH_MIX_EN']:
+            texts = [re.sub(r'([a-z])([A-Z])', r'\1 \2', t) for t in texts]
+        return get_text_for_tts_infer_batch(texts, self.language, self.hps, self.device, self.symbol_to_id, feature_cache=self.feature_cache)
+
+    def _infer_args(self, features, speaker_id):
+        """Positional SynthesizerTrn.infer arguments for one sentence."""
+        bert, ja_bert, phones, tones, lang_ids = features
+        device = self.device
+        return (
+            phones.to(device).unsqueeze(0),
+            torch.LongTensor([phones.size(0)]).to(device),
+            torch.LongTensor([speaker_id]).to(device),
+            tones.to(device).unsqueeze(0),
+            lang_ids.to(device).unsqueeze(0),
+            bert.to(device).unsqueeze(0) if bert is not None else None,
+            ja_bert.to(device).unsqueeze(0) if ja_bert is not None else None,
+        )
+
+    @staticmethod
+    def _generator(seed):
+        return torch.Generator().manual_seed(seed) if seed is not None else None
+
+    def _encode(self, features, speaker_id, sdp_ratio, noise_scale_w, seed=None):
+        """Stage-1 output for one sentence and the generator to keep sampling from (call under no_grad)."""
+        generator = self._generator(seed)
+        key = None
+        if self.encoder_cache is not None and (seed is not None or not samples_durations(sdp_ratio, noise_scale_w)):
+            key = self.encoder_cache.key(features, speaker_id, sdp_ratio, noise_scale_w, seed)
+            cached = self.encoder_cache.get(key)
+            if cached is not None:
+                encoded, state = cached
+                if state is not None:
+                    generator.set_state(state)
+                return encoded, generator
+
+        encoded = self.runner.encode(
+            *self._infer_args(features, speaker_id),
+            sdp_ratio=sdp_ratio,
+            noise_scale_w=noise_scale_w,
+            generator=generator,
+        )
+        if key is not None:
+            self.encoder_cache.put(key, encoded, generator.get_state() if generator is not None else None)
+        return encoded, generator
+
+    def _synthesize(self, features, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed, seed=None):
+        """Returns a Future for one sentence's waveform."""
+        bert, ja_bert, phones, tones, lang_ids = features
+        if self.scheduler is not None:
+            return self.scheduler.submit(
+                phones, tones, lang_ids, bert, ja_bert, speaker_id,
+                sdp_ratio=sdp_ratio,
+                noise_scale=noise_scale,
+                noise_scale_w=noise_scale_w,
+                length_scale=1. / speed,
+                seed=seed,
+            )
+
+        future = Future()
+        with torch.no_grad(), precision_context(self.model):
+            encoded, generator = self._encode(features, speaker_id, sdp_ratio, noise_scale_w, seed)
+            audio = self.runner.render(
+                    encoded,
+                    noise_scale=noise_scale,
+                    length_scale=1. / speed,
+                    generator=generator,
+                )[0][0, 0].data.cpu().float().numpy()
+        future.set_result(audio)
+        return future
+
+    def _synthesize_chunks(self, features, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed, seed=None):
+        """Yields one sentence's waveform decoder chunk by decoder chunk."""
+        with torch.no_grad(), precision_context(self.model):
+            encoded, generator = self._encode(features, speaker_id, sdp_ratio, noise_scale_w, seed)
+        stream = self.model.render_stream(
+            encoded,
+            chunk_frames=self.max_chunk_frames,
+            overlap_frames=self.chunk_overlap_frames,
+            noise_scale=noise_scale,
+            length_scale=1. / speed,
+            generator=generator,
+        )
+        while True:
+            # grad/autocast state only around the model work, not across yields
+            with torch.no_grad(), precision_context(self.model):
+                audio = next(stream, None)
+            if audio is None:
+                return
+            yield audio[0, 0].data.cpu().float().numpy()
+
     @staticmethod
     def split_sentences_into_pieces(text, language, quiet=False):
         texts = split_sentence(text, language_str=language)
@@ -96,7 +96,7 @@ class Encoder(nn.Module):
             self.norm_layers_2.append(LayerNorm(hidden_channels))
 
     def forward(self, x, x_mask, g=None):
-        attn_mask = x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
+        attn_mask = commons.attention_mask(x_mask)
         x = x * x_mask
         for i in range(self.n_layers):
             if i == self.cond_layer_idx and g is not None:
@@ -272,6 +272,14 @@ class MultiHeadAttention(nn.Module):
         key = key.view(b, self.n_heads, self.k_channels, t_s).transpose(2, 3)
         value = value.view(b, self.n_heads, self.k_channels, t_s).transpose(2, 3)
 
+        # the windowed path specializes on the sequence length, so ONNX export
+        # (dynamic time axes) keeps the generic path below
+        fast = not self.training and self.block_length is None and not torch.onnx.is_in_onnx_export()
+        if fast and self.window_size is not None and t_s == t_t:
+            output, p_attn = self._windowed_attention(query, key, value, mask)
+            # [b, n_h, t_t, d_k] -> [b, d, t_t]
+            return output.transpose(2, 3).contiguous().view(b, d, t_t), p_attn
+
         scores = torch.matmul(query / math.sqrt(self.k_channels), key.transpose(-2, -1))
         if self.window_size is not None:
             assert (
@@ -316,6 +324,43 @@ class MultiHeadAttention(nn.Module):
         )  # [b, n_h, t_t, d_k] -> [b, d, t_t]
         return output, p_attn
 
+    def _windowed_attention(self, query, key, value, mask=None):
+        """
+        Inference path for relative self-attention. Only the 2 * window_size + 1
+        diagonals around the main one carry relative terms, so the relative key
+        logits are computed as [b, h, t, 2w+1] and added to those diagonals of
+        the score matrix in place, and the relative value weights are read back
+        from the same diagonals of the probabilities. Equivalent to the
+        pad/reshape path in ``attention`` without its [b, h, t, 2t] buffers.
+        query/key/value: [b, h, t, d_k]
+        """
+        length = query.size(2)
+        window = self.window_size
+        offsets = range(-min(window, length - 1), min(window, length - 1) + 1)
+
+        query = query / math.sqrt(self.k_channels)
+        scores = torch.matmul(query, key.transpose(-2, -1))
+        rel_logits = self._matmul_with_relative_keys(query, self.emb_rel_k)  # [b, h, t, 2w+1]
+        for offset in offsets:
+            # diagonal(offset) holds (i, i + offset) for i in [max(-offset, 0), length - max(offset, 0))
+            scores.diagonal(offset, dim1=-2, dim2=-1).add_(
+                rel_logits[:, :, max(-offset, 0):length - max(offset, 0), offset + window]
+            )
+        if self.proximal_bias:
+            scores = scores + self._attention_bias_proximal(length, scores.device, scores.dtype)
+        if mask is not None:
+            scores.masked_fill_(mask == 0, -1e4)
+        p_attn = F.softmax(scores, dim=-1)
+        output = torch.matmul(p_attn, value)
+
+        relative_weights = p_attn.new_zeros(*p_attn.shape[:3], 2 * window + 1)
+        for offset in offsets:
+            relative_weights[:, :, max(-offset, 0):length - max(offset, 0), offset + window] = p_attn.diagonal(
+                offset, dim1=-2, dim2=-1
+            )
+        output = output + self._matmul_with_relative_values(relative_weights, self.emb_rel_v)
+        return output, p_attn
+
     def _matmul_with_relative_values(self, x, y):
         """
         x: [b, h, l, m]
@@ -389,16 +434,24 @@ class MultiHeadAttention(nn.Module):
         x_final = x_flat.view([batch, heads, length, 2 * length])[:, :, :, 1:]
         return x_final
 
-    def _attention_bias_proximal(self, length):
+    def _attention_bias_proximal(self, length, device="cpu", dtype=torch.float32):
         """Bias for self-attention to encourage attention to close positions.
         Args:
           length: an integer scalar.
         Returns:
           a Tensor with shape [1, 1, length, length]
         """
-        r = torch.arange(length, dtype=torch.float32)
-        diff = torch.unsqueeze(r, 0) - torch.unsqueeze(r, 1)
-        return torch.unsqueeze(torch.unsqueeze(-torch.log1p(torch.abs(diff)), 0), 0)
+        def build(bucket):
+            r = torch.arange(bucket, dtype=torch.float32)
+            diff = torch.unsqueeze(r, 0) - torch.unsqueeze(r, 1)
+            return -torch.log1p(torch.abs(diff))
+
+        if commons.is_tracing():
+            bias = build(length).to(device=device, dtype=dtype)
+        else:
+            # depends only on |i - j|, so the top-left block of a longer bias is exact
+            bias = commons.cached_position_tensor("proximal", length, device, dtype, build)
+        return torch.unsqueeze(torch.unsqueeze(bias, 0), 0)
 
 
 class FFN(nn.Module):
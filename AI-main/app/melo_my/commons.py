@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+
 import torch
 from torch.nn import functional as F
 
@@ -117,13 +120,104 @@ def convert_pad_shape(pad_shape):
 #     return x
 
 
+# Position tensors (aranges, proximal biases) are built once per power-of-two
+# length bucket, device and dtype and sliced for shorter lengths; the least
+# recently used entries are dropped beyond POSITION_CACHE_ENTRIES. Traced
+# graphs keep building them so the lengths stay dynamic.
+POSITION_CACHE_ENTRIES = 32
+_position_cache = OrderedDict()
+_position_lock = threading.Lock()
+_mask_cache = threading.local()
+
+
+def is_tracing():
+    """True while a graph is captured (torch.jit trace/script, torch.compile): no host-side caches or checks."""
+    compiling = getattr(torch, "compiler", None) is not None and torch.compiler.is_compiling()
+    return compiling or torch.jit.is_tracing() or torch.jit.is_scripting()
+
+
+def _length_bucket(length):
+    return max(64, 1 << (int(length) - 1).bit_length())
+
+
+def cached_position_tensor(name, length, device, dtype, build):
+    """``build(bucket_length)`` sliced to ``length`` along every dim, cached per bucket."""
+    key = (name, _length_bucket(length), torch.device(device), dtype)
+    with _position_lock:
+        tensor = _position_cache.get(key)
+        if tensor is not None:
+            _position_cache.move_to_end(key)
+    if tensor is None:
+        tensor = build(key[1]).to(device=device, dtype=dtype)
+        with _position_lock:
+            _position_cache[key] = tensor
+            while len(_position_cache) > POSITION_CACHE_ENTRIES:
+                _position_cache.popitem(last=False)
+    return tensor[tuple(slice(0, length) for _ in range(tensor.dim()))]
+
+
+def arange(length, device=None, dtype=torch.long):
+    if is_tracing():
+        return torch.arange(length, dtype=dtype, device=device)
+    return cached_position_tensor("arange", int(length), device or "cpu", dtype, torch.arange)
+
+
+def attention_mask(x_mask):
+    """
+    [b, 1, t, t] self-attention mask for ``x_mask`` [b, 1, t], or None when
+    nothing is masked. The last result is kept per thread, so the layers of
+    one forward pass (e.g. every coupling layer of the flow) share it.
+    The all-ones check only runs for CPU masks; on other devices it would
+    wait for the device, so the mask is always built there.
+    """
+    if is_tracing():
+        return x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
+    cached = getattr(_mask_cache, "entry", None)
+    if cached is not None and cached[0] is x_mask:
+        return cached[1]
+    unmasked = x_mask.device.type == "cpu" and bool(x_mask.all())
+    mask = None if unmasked else x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
+    _mask_cache.entry = (x_mask, mask)
+    return mask
+
+
 def sequence_mask(length, max_length=None):
     if max_length is None:
         max_length = length.max()
-    x = torch.arange(max_length, dtype=length.dtype, device=length.device)
+    x = arange(max_length, device=length.device, dtype=length.dtype)
     return x.unsqueeze(0) < length.unsqueeze(1)
 
 
+def randn_like(x, generator=None):
+    """torch.randn_like, optionally drawn from a (CPU) torch.Generator."""
+    if generator is None:
+        return torch.randn_like(x)
+    return torch.randn(x.shape, generator=generator, dtype=x.dtype).to(x.device)
+
+
+def duration_to_indices(duration, t_y):
+    """
+    duration: [b, 1, t_x] integer-valued
+    Phone index of every output frame: frame y belongs to phone x when
+    cum[x - 1] <= y < cum[x], the same alignment generate_path builds.
+    Frames past the total duration get the last index and must be masked.
+    ret: [b, t_y]
+    """
+    cum_duration = torch.cumsum(duration.squeeze(1), -1)
+    frames = arange(t_y, device=duration.device, dtype=cum_duration.dtype)
+    frames = frames.unsqueeze(0).expand(cum_duration.size(0), -1).contiguous()
+    indices = torch.searchsorted(cum_duration, frames, right=True)
+    return indices.clamp_(max=cum_duration.size(1) - 1)
+
+
+def expand_frames(x, indices):
+    """
+    x: [b, d, t_x], indices: [b, t_y] from duration_to_indices
+    ret: [b, d, t_y]
+    """
+    return torch.gather(x, 2, indices.unsqueeze(1).expand(-1, x.size(1), -1))
+
+
 def generate_path(duration, mask):
     """
     duration: [b, 1, t_x]
@@ -0,0 +1,502 @@
+import hashlib
+import logging
+import os
+import threading
+import warnings
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .models import EncoderOutput, SynthesizerTrn
+from .precision import precision_context
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+logger = logging.getLogger(__name__)
+
+
+class EncoderStage(nn.Module):
+    """
+    Speaker embedding + TextEncoder + both duration predictors, for the
+    bert=None (single BERT stream, e.g. KR) inference path.
+    Returns (g, m_p, logs_p, x_mask, logw).
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.emb_g = model.emb_g
+        self.enc_p = model.enc_p
+        self.sdp = model.sdp
+        self.dp = model.dp
+        self.use_vc = model.use_vc
+
+    def forward(self, x, x_lengths, sid, tone, language, ja_bert, noise_scale_w, sdp_ratio):
+        g = self.emb_g(sid).unsqueeze(-1)
+        g_p = None if self.use_vc else g
+        x, m_p, logs_p, x_mask = self.enc_p(x, x_lengths, tone, language, None, ja_bert, g=g_p)
+        logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w) * sdp_ratio + self.dp(
+            x, x_mask, g=g
+        ) * (1 - sdp_ratio)
+        return g, m_p, logs_p, x_mask, logw
+
+
+class FlowStage(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.flow = model.flow
+
+    def forward(self, z_p, y_mask, g):
+        return self.flow(z_p, y_mask, g=g, reverse=True)
+
+
+class DecoderStage(nn.Module):
+    """Generator with the frame mask, so bucket padding does not leak into the output."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.dec = model.dec
+
+    def forward(self, z, y_mask, g):
+        return self.dec(z * y_mask, g=g, x_mask=y_mask)
+
+
+def samples_durations(sdp_ratio, noise_scale_w):
+    """Whether the stochastic duration predictor's noise reaches the output."""
+    return float(sdp_ratio) != 0 and float(noise_scale_w) != 0
+
+
+def example_inputs(model, name, length):
+    """Dummy inputs of the given time length for tracing/exporting a stage."""
+    if name == "encoder":
+        return (
+            torch.ones(1, length, dtype=torch.long),
+            torch.LongTensor([length]),
+            torch.zeros(1, dtype=torch.long),
+            torch.zeros(1, length, dtype=torch.long),
+            torch.zeros(1, length, dtype=torch.long),
+            torch.zeros(1, model.enc_p.ja_bert_proj.in_channels, length),
+            torch.tensor(0.8),
+            torch.tensor(0.2),
+        )
+    # flow and decoder both take (z, y_mask, g)
+    return (
+        torch.zeros(1, model.inter_channels, length),
+        torch.ones(1, 1, length),
+        torch.zeros(1, model.gin_channels, 1),
+    )
+
+
+# ONNX graph signatures: (inputs, outputs, dynamic axes)
+ONNX_GRAPHS = {
+    "encoder": (
+        ["x", "x_lengths", "sid", "tone", "language", "ja_bert", "noise_scale_w", "sdp_ratio"],
+        ["g", "m_p", "logs_p", "x_mask", "logw"],
+        {
+            "x": {0: "batch", 1: "phones"},
+            "x_lengths": {0: "batch"},
+            "sid": {0: "batch"},
+            "tone": {0: "batch", 1: "phones"},
+            "language": {0: "batch", 1: "phones"},
+            "ja_bert": {0: "batch", 2: "phones"},
+            "g": {0: "batch"},
+            "m_p": {0: "batch", 2: "phones"},
+            "logs_p": {0: "batch", 2: "phones"},
+            "x_mask": {0: "batch", 2: "phones"},
+            "logw": {0: "batch", 2: "phones"},
+        },
+    ),
+    "flow": (
+        ["z_p", "y_mask", "g"],
+        ["z"],
+        {"z_p": {0: "batch", 2: "frames"}, "y_mask": {0: "batch", 2: "frames"}, "g": {0: "batch"}, "z": {0: "batch", 2: "frames"}},
+    ),
+    "decoder": (
+        ["z", "y_mask", "g"],
+        ["o"],
+        {"z": {0: "batch", 2: "frames"}, "y_mask": {0: "batch", 2: "frames"}, "g": {0: "batch"}, "o": {0: "batch", 2: "samples"}},
+    ),
+}
+STAGES = {"encoder": EncoderStage, "flow": FlowStage, "decoder": DecoderStage}
+
+
+def export_onnx(model, directory, opset_version=17, example_phones=64, example_frames=256):
+    """
+    Export the encoder (+ duration predictors), flow and decoder of an eval-mode
+    SynthesizerTrn as three ONNX graphs with dynamic batch and time axes.
+    Returns {stage: path}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, (input_names, output_names, dynamic_axes) in ONNX_GRAPHS.items():
+        length = example_phones if name == "encoder" else example_frames
+        path = os.path.join(directory, f"{name}.onnx")
+        tmp_path = f"{path}.tmp"
+        with torch.no_grad(), warnings.catch_warnings():
+            warnings.simplefilter("ignore", torch.jit.TracerWarning)
+            torch.onnx.export(
+                STAGES[name](model).eval(),
+                example_inputs(model, name, length),
+                tmp_path,
+                input_names=input_names,
+                output_names=output_names,
+                dynamic_axes=dynamic_axes,
+                opset_version=opset_version,
+                dynamo=False,
+            )
+        os.replace(tmp_path, path)
+        paths[name] = path
+    logger.info("Exported ONNX graphs to %s", directory)
+    return paths
+
+
+def _bucket(length, buckets):
+    for b in buckets:
+        if length <= b:
+            return b
+    return None
+
+
+def _pad_to(t, length):
+    return nn.functional.pad(t, (0, length - t.shape[-1]))
+
+
+# sources whose changes invalidate traced graphs on disk
+_GRAPH_SOURCES = ("models.py", "modules.py", "attentions.py", "commons.py", "transforms.py", "export.py")
+
+
+def graph_fingerprint():
+    """Short hash of the synthesizer code and the torch version, part of the traced graph cache path."""
+    digest = hashlib.sha256(torch.__version__.encode("utf-8"))
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in _GRAPH_SOURCES:
+        with open(os.path.join(directory, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def _warn_seeded_fallback(runner, name):
+    """Log once per runner that seeded SDP sampling bypasses its encoder graph."""
+    if runner._warned_seeded_fallback:
+        return
+    runner._warned_seeded_fallback = True
+    logger.warning(
+        "Seeded sampling with sdp_ratio > 0 and noise_scale_w > 0 runs the encoder eagerly, "
+        "bypassing the %s encoder graph; set sdp_ratio or noise_scale_w to 0, or drop the seed, "
+        "to use it",
+        name,
+    )
+
+
+class CompiledInference:
+    """
+    Drop-in ``infer`` / ``encode`` / ``render`` for SynthesizerTrn that runs the encoder/duration
+    predictors, the flow and the decoder as separately traced (TorchScript)
+    submodules. Inputs are padded to fixed length buckets so each bucket has
+    one static-shape graph; traced graphs are saved under ``cache_dir`` (per
+    ``cache_key`` and graph_fingerprint(), so code or torch upgrades retrace)
+    and loaded on the next start.
+
+    Falls back to the eager model for batch sizes other than 1, for inputs
+    with a second BERT stream, or beyond the largest bucket. Seeded calls
+    that sample stochastic durations also run the encoder eagerly (logged
+    once), since the graph draws that noise from the global RNG.
+    """
+
+    def __init__(
+        self,
+        model,
+        backend="script",
+        x_buckets=(32, 64, 128, 256),
+        y_bucket_frames=128,
+        max_y_frames=2048,
+        cache_dir=None,
+        cache_key="model",
+    ):
+        # torch.compile has no on-disk cache and recompiles per bucket on the first request
+        if backend != "script":
+            raise ValueError(f"Unknown backend {backend!r}, expected 'script'")
+        self.model = model
+        self.backend = backend
+        self.x_buckets = tuple(sorted(x_buckets))
+        self.y_buckets = tuple(range(y_bucket_frames, max_y_frames + 1, y_bucket_frames))
+        self.cache_dir = os.path.join(cache_dir, f"{cache_key}-{graph_fingerprint()}") if cache_dir else None
+        self.upsample_factor = int(torch.tensor(model.upsample_rates).prod())
+
+        self.stages = {
+            "encoder": EncoderStage(model).eval(),
+            "flow": FlowStage(model).eval(),
+            "decoder": DecoderStage(model).eval(),
+        }
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self._warned_seeded_fallback = False
+
+    # SynthesizerTrn attributes used by the scheduler / precision helpers
+    @property
+    def upsample_rates(self):
+        return self.model.upsample_rates
+
+    @property
+    def precision(self):
+        return getattr(self.model, "precision", "fp32")
+
+    def _path(self, name, length):
+        return os.path.join(self.cache_dir, f"{name}_{length}.pt") if self.cache_dir else None
+
+    def _get(self, name, length):
+        key = (name, length)
+        module = self._compiled.get(key)
+        if module is not None:
+            return module
+        with self._lock:
+            module = self._compiled.get(key)
+            if module is None:
+                module = self._build(name, length)
+                self._compiled[key] = module
+        return module
+
+    def _build(self, name, length):
+        stage = self.stages[name]
+        path = self._path(name, length)
+        with warnings.catch_warnings():
+            # torch.jit deprecation notices and shape-specialization warnings
+            # (expected: each graph is only used for its own bucket)
+            warnings.simplefilter("ignore", FutureWarning)
+            warnings.simplefilter("ignore", torch.jit.TracerWarning)
+            if path and os.path.exists(path):
+                return torch.jit.load(path)
+            with torch.no_grad(), precision_context(self.model):
+                traced = torch.jit.trace(stage, example_inputs(self.model, name, length), check_trace=False)
+            if self.precision == "fp32":
+                traced = torch.jit.freeze(traced.eval())
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                torch.jit.save(traced, path)
+        return traced
+
+    def warmup(self, x_buckets=None, y_buckets=None):
+        """Build (or load from disk) the graphs for the given buckets ahead of the first request."""
+        for length in x_buckets or self.x_buckets:
+            self._get("encoder", length)
+        for length in y_buckets or self.y_buckets:
+            self._get("flow", length)
+            self._get("decoder", length)
+        logger.info("Compiled TTS graphs ready: %d (%s)", len(self._compiled), self.backend)
+
+    def encode(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale_w=0.8,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        generator=None,
+    ):
+        """SynthesizerTrn.encode through the encoder graph of the input's length bucket."""
+        x_bucket = _bucket(x.shape[-1], self.x_buckets)
+        # the SDP noise is sampled inside the traced encoder graph, so seeded
+        # sampling that reaches it runs eagerly
+        seeded_sdp = generator is not None and samples_durations(sdp_ratio, noise_scale_w)
+        if seeded_sdp:
+            _warn_seeded_fallback(self, self.backend)
+        if (
+            x.shape[0] != 1 or bert is not None or ja_bert is None or x_bucket is None or g is not None
+            or seeded_sdp
+        ):
+            return self.model.encode(
+                x, x_lengths, sid, tone, language, bert, ja_bert,
+                noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio, y=y, g=g, generator=generator,
+            )
+
+        g, m_p, logs_p, x_mask, logw = self._get("encoder", x_bucket)(
+            _pad_to(x, x_bucket),
+            x_lengths,
+            sid,
+            _pad_to(tone, x_bucket),
+            _pad_to(language, x_bucket),
+            _pad_to(ja_bert, x_bucket),
+            torch.tensor(float(noise_scale_w)),
+            torch.tensor(float(sdp_ratio)),
+        )
+        # padded phones have x_mask 0 (zero duration), so they can be cut off
+        length = x.shape[-1]
+        return EncoderOutput(
+            g, m_p[:, :, :length], logs_p[:, :, :length], x_mask[:, :, :length], logw[:, :, :length]
+        )
+
+    def render(self, encoded, noise_scale=0.667, length_scale=1, max_len=None, return_attn=False, generator=None):
+        """SynthesizerTrn.render through the flow and decoder graphs of the output's frame bucket."""
+        if encoded.m_p.shape[0] != 1:
+            return self.model.render(
+                encoded, noise_scale=noise_scale, length_scale=length_scale, max_len=max_len,
+                return_attn=return_attn, generator=generator,
+            )
+        g = encoded.g
+        z_p, y_mask, attn, m_p, logs_p = SynthesizerTrn.expand(
+            encoded.logw, encoded.x_mask, encoded.m_p, encoded.logs_p,
+            length_scale=length_scale, noise_scale=noise_scale, return_attn=return_attn, generator=generator,
+        )
+
+        y_len = z_p.shape[-1]
+        y_bucket = _bucket(y_len, self.y_buckets)
+        if y_bucket is None:
+            z = self.model.flow_reverse(z_p, y_mask, g)
+            o = self.model.decode(z, y_mask, g, max_len=max_len)
+            return o, attn, y_mask, (z, z_p, m_p, logs_p)
+
+        padded_mask = _pad_to(y_mask, y_bucket)
+        z = self._get("flow", y_bucket)(_pad_to(z_p, y_bucket), padded_mask, g)
+        o = self._get("decoder", y_bucket)(z, padded_mask, g)
+        z = z[:, :, :y_len]
+        o = o[:, :, : y_len * self.upsample_factor]
+        if max_len is not None:
+            o = o[:, :, : max_len * self.upsample_factor]
+        return o, attn, y_mask, (z, z_p, m_p, logs_p)
+
+    def infer(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        max_len=None,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        return_attn=True,
+        generator=None,
+    ):
+        encoded = self.encode(
+            x, x_lengths, sid, tone, language, bert, ja_bert,
+            noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio, y=y, g=g, generator=generator,
+        )
+        return self.render(
+            encoded, noise_scale=noise_scale, length_scale=length_scale, max_len=max_len,
+            return_attn=return_attn, generator=generator,
+        )
+
+
+class OnnxInference:
+    """
+    ``SynthesizerTrn.infer`` (and its ``encode`` / ``render`` stages) on ONNX
+    Runtime: the encoder (+ duration predictors), flow and decoder graphs run
+    on the CPU provider and only the duration rounding / alignment expansion
+    between them stays in torch.
+    Supports the single-BERT-stream (KR) path, i.e. ``bert`` must be None.
+    Seeded calls whose stochastic-duration noise matters (the graph samples it
+    internally) go to ``fallback``, an eager SynthesizerTrn, when given
+    (logged once).
+    """
+
+    def __init__(self, directory, upsample_rates, intra_op_threads=0, inter_op_threads=1, fallback=None):
+        if ort is None:
+            raise ImportError("onnxruntime is required for OnnxInference: pip install onnxruntime")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.sessions = {
+            name: ort.InferenceSession(
+                os.path.join(directory, f"{name}.onnx"), sess_options=options, providers=["CPUExecutionProvider"]
+            )
+            for name in ONNX_GRAPHS
+        }
+        self.upsample_rates = list(upsample_rates)
+        self.upsample_factor = int(np.prod(self.upsample_rates))
+        self.precision = "fp32"
+        self.fallback = fallback
+        self._warned_seeded_fallback = False
+
+    def _run(self, name, *inputs):
+        input_names = ONNX_GRAPHS[name][0]
+        feeds = {key: value.detach().cpu().numpy() for key, value in zip(input_names, inputs)}
+        return [torch.from_numpy(out) for out in self.sessions[name].run(None, feeds)]
+
+    def encode(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale_w=0.8,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        generator=None,
+    ):
+        if bert is not None or g is not None:
+            raise ValueError("OnnxInference only supports bert=None and speaker ids (no reference g)")
+        if generator is not None and samples_durations(sdp_ratio, noise_scale_w):
+            if self.fallback is None:
+                raise ValueError("Seeded sampling with sdp_ratio > 0 needs an eager fallback model")
+            _warn_seeded_fallback(self, "ONNX Runtime")
+            return self.fallback.encode(
+                x, x_lengths, sid, tone, language, bert, ja_bert,
+                noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio, generator=generator,
+            )
+        return EncoderOutput(*self._run(
+            "encoder",
+            x, x_lengths, sid, tone, language, ja_bert,
+            torch.tensor(float(noise_scale_w)), torch.tensor(float(sdp_ratio)),
+        ))
+
+    def render(self, encoded, noise_scale=0.667, length_scale=1, max_len=None, return_attn=False, generator=None):
+        g = encoded.g
+        z_p, y_mask, attn, m_p, logs_p = SynthesizerTrn.expand(
+            encoded.logw, encoded.x_mask, encoded.m_p, encoded.logs_p,
+            length_scale=length_scale, noise_scale=noise_scale, return_attn=return_attn, generator=generator,
+        )
+        (z,) = self._run("flow", z_p, y_mask, g)
+        if max_len is not None:
+            z, y_mask_dec = z[:, :, :max_len], y_mask[:, :, :max_len]
+        else:
+            y_mask_dec = y_mask
+        (o,) = self._run("decoder", z, y_mask_dec, g)
+        return o, attn, y_mask, (z, z_p, m_p, logs_p)
+
+    def infer(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        max_len=None,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        return_attn=True,
+        generator=None,
+    ):
+        encoded = self.encode(
+            x, x_lengths, sid, tone, language, bert, ja_bert,
+            noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio, y=y, g=g, generator=generator,
+        )
+        return self.render(
+            encoded, noise_scale=noise_scale, length_scale=length_scale, max_len=max_len,
+            return_attn=return_attn, generator=generator,
+        )
@@ -0,0 +1,281 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class _Features:
+    """
+    Compact per-sentence front-end output.
+    Phone/tone/language ids are stored as small ints and the phone-level BERT
+    matrix as fp16. An unused (None or all-zero) bert/ja_bert slot is stored
+    as a scalar: 0 for None, otherwise its channel count.
+    """
+
+    __slots__ = ("phones", "tones", "lang_ids", "bert", "ja_bert", "nbytes")
+
+    def __init__(self, phones, tones, lang_ids, bert, ja_bert):
+        self.phones = phones
+        self.tones = tones
+        self.lang_ids = lang_ids
+        self.bert = bert
+        self.ja_bert = ja_bert
+        self.nbytes = sum(
+            a.nbytes for a in (phones, tones, lang_ids, bert, ja_bert) if isinstance(a, np.ndarray)
+        )
+
+    @staticmethod
+    def _pack_bert(t):
+        if t is None:
+            return 0
+        if not torch.any(t):
+            return t.shape[0]
+        return t.detach().cpu().to(torch.float16).numpy()
+
+    @staticmethod
+    def _unpack_bert(a, length):
+        if isinstance(a, np.ndarray):
+            return torch.from_numpy(a.astype(np.float32))
+        if not a:
+            return None
+        return torch.zeros(int(a), length)
+
+    @classmethod
+    def pack(cls, bert, ja_bert, phones, tones, lang_ids):
+        return cls(
+            phones.numpy().astype(np.int16),
+            tones.numpy().astype(np.int8),
+            lang_ids.numpy().astype(np.int8),
+            cls._pack_bert(bert),
+            cls._pack_bert(ja_bert),
+        )
+
+    def unpack(self):
+        length = self.phones.shape[0]
+        return (
+            self._unpack_bert(self.bert, length),
+            self._unpack_bert(self.ja_bert, length),
+            torch.from_numpy(self.phones.astype(np.int64)),
+            torch.from_numpy(self.tones.astype(np.int64)),
+            torch.from_numpy(self.lang_ids.astype(np.int64)),
+        )
+
+    def save(self, path):
+        arrays = {"phones": self.phones, "tones": self.tones, "lang_ids": self.lang_ids}
+        for name in ("bert", "ja_bert"):
+            value = getattr(self, name)
+            arrays[name] = value if isinstance(value, np.ndarray) else np.array(value, dtype=np.int64)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            bert, ja_bert = (
+                data[name] if data[name].ndim == 2 else int(data[name]) for name in ("bert", "ja_bert")
+            )
+            return cls(data["phones"], data["tones"], data["lang_ids"], bert, ja_bert)
+
+
+class TextFeatureCache:
+    """
+    Sentence-level cache for get_text_for_tts_infer.
+    A hit skips both clean_text (normalize + G2P) and the BERT forward.
+    Entries live in an in-memory LRU and, when ``directory`` is given, in
+    .npz files on disk evicted least-recently-used past ``disk_max_bytes``.
+    """
+
+    def __init__(self, max_entries=4096, directory=None, disk_max_bytes=256 * 1024 * 1024, precision="fp32"):
+        self.max_entries = max_entries
+        # BERT precision mode, part of every key (int8/bf16 BERT gives different features)
+        self.precision = precision
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            found = []
+            for name in os.listdir(directory):
+                if name.endswith(".npz"):
+                    stat = os.stat(os.path.join(directory, name))
+                    found.append((stat.st_mtime, name[:-4], stat.st_size))
+            for _, key, size in sorted(found):
+                self._disk[key] = size
+                self._disk_bytes += size
+
+    @staticmethod
+    def key(text, language_str, hps, symbol_to_id=None, precision="fp32"):
+        """Everything that changes the front-end output for a sentence."""
+        symbols = sorted(symbol_to_id.items(), key=lambda kv: kv[1]) if symbol_to_id else []
+        raw = "\x00".join([
+            language_str,
+            precision,
+            text,
+            str(bool(hps.data.add_blank)),
+            str(bool(getattr(hps.data, "disable_bert", False))),
+            "".join(s for s, _ in symbols),
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        with self._lock:
+            features = self._memory.get(key)
+            if features is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return features.unpack()
+            on_disk = key in self._disk
+
+        if on_disk:
+            try:
+                features = _Features.load(self._path(key))
+            except (OSError, ValueError, KeyError):
+                features = None
+            with self._lock:
+                if features is None:
+                    self._disk_bytes -= self._disk.pop(key, 0)
+                else:
+                    self._disk.move_to_end(key)
+                    self._remember(key, features)
+                    self.disk_hits += 1
+                    return features.unpack()
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, bert, ja_bert, phones, tones, lang_ids):
+        """
+        Store one sentence's features and return them as get() will (fp16-rounded
+        BERT), so the first synthesis of a sentence matches the cached ones.
+        """
+        features = _Features.pack(bert, ja_bert, phones, tones, lang_ids)
+        with self._lock:
+            self._remember(key, features)
+        if not self.directory:
+            return features.unpack()
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            features.save(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write feature cache entry: %s", e)
+            return features.unpack()
+        size = os.path.getsize(path)
+
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._disk[key] = size
+            self._disk_bytes += size
+            evicted = []
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+                old_key, old_size = self._disk.popitem(last=False)
+                self._disk_bytes -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+        return features.unpack()
+
+    def _remember(self, key, features):
+        self._memory[key] = features
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": sum(f.nbytes for f in self._memory.values()),
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+class EncoderOutputCache:
+    """
+    Sentence-level cache for SynthesizerTrn.encode (text encoder + duration
+    predictors), keyed by the sentence's front-end features and the duration
+    sampling parameters. A hit re-renders the sentence at another speed or
+    prior noise scale with only the flow and decoder.
+    Only deterministic encodes belong here (TTS._encode skips unseeded calls
+    that sample stochastic durations). Seeded entries also keep the generator
+    state after encoding, so a hit continues the exact random stream of an
+    uncached call.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(features, speaker_id, sdp_ratio, noise_scale_w, seed=None):
+        """Everything that changes the encode output for a sentence."""
+        digest = hashlib.sha256()
+        for t in features:
+            if t is None:
+                digest.update(b"none")
+                continue
+            t = t.detach().cpu().contiguous()
+            digest.update(f"{t.dtype}{tuple(t.shape)}".encode("utf-8"))
+            digest.update(t.numpy().tobytes())
+        digest.update(f"{speaker_id}\x00{float(sdp_ratio):.4f}\x00{float(noise_scale_w):.4f}\x00{seed}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """(EncoderOutput, generator state or None), or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, encoded, generator_state=None):
+        with self._lock:
+            self._memory[key] = (encoded, generator_state)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "bytes": sum(
+                    t.element_size() * t.nelement() for encoded, _ in self._memory.values() for t in encoded
+                ),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,4 +1,6 @@
 import math
+from typing import NamedTuple
+
 import torch
 from torch import nn
 from torch.nn import functional as F
@@ -9,12 +11,27 @@ from . import attentions
 
 from torch.nn import Conv1d, ConvTranspose1d, Conv2d
 # from torch.nn.utils import weight_norm, remove_weight_norm, spectral_norm
-from torch.nn.utils import remove_weight_norm, spectral_norm
+from torch.nn.utils import spectral_norm
 from torch.nn.utils.parametrizations import weight_norm
+from .modules import remove_weight_norm
 from .commons import init_weights, get_padding
 from .monotonic_align import maximum_path
 
 
+class EncoderOutput(NamedTuple):
+    """
+    SynthesizerTrn.encode result: speaker embedding g [b, h, 1], phone-level
+    prior m_p / logs_p [b, d, t], x_mask [b, 1, t] and log durations logw
+    [b, 1, t]. Independent of speed and prior noise.
+    """
+
+    g: torch.Tensor
+    m_p: torch.Tensor
+    logs_p: torch.Tensor
+    x_mask: torch.Tensor
+    logw: torch.Tensor
+
+
 class DurationDiscriminator(nn.Module):  # vits2
     def __init__(
         self, in_channels, filter_channels, kernel_size, p_dropout, gin_channels=0
@@ -204,7 +221,8 @@ class StochasticDurationPredictor(nn.Module):
         if gin_channels != 0:
             self.cond = nn.Conv1d(gin_channels, filter_channels, 1)
 
-    def forward(self, x, x_mask, w=None, g=None, reverse=False, noise_scale=1.0):
+    def forward(self, x, x_mask, w=None, g=None, reverse=False, noise_scale=1.0, generator=None):
+        # generator: optional CPU torch.Generator for reproducible reverse sampling
         x = torch.detach(x)
         x = self.pre(x)
         if g is not None:
@@ -256,7 +274,7 @@ class StochasticDurationPredictor(nn.Module):
             flows = list(reversed(self.flows))
             flows = flows[:-2] + [flows[-1]]  # remove a useless vflow
             z = (
-                torch.randn(x.size(0), 2, x.size(2)).to(device=x.device, dtype=x.dtype)
+                torch.randn(x.size(0), 2, x.size(2), generator=generator).to(device=x.device, dtype=x.dtype)
                 * noise_scale
             )
             for flow in flows:
@@ -358,9 +376,17 @@ class TextEncoder(nn.Module):
         )
         self.proj = nn.Conv1d(hidden_channels, out_channels * 2, 1)
 
+    @staticmethod
+    def _bert_embedding(proj, bert):
+        # bert=None stands for an all-zero feature stream; a 1x1 conv of zeros is
+        # just its bias, so skip materializing the [C, T] zero matrix
+        if bert is None:
+            return proj.bias
+        return proj(bert).transpose(1, 2)
+
     def forward(self, x, x_lengths, tone, language, bert, ja_bert, g=None):
-        bert_emb = self.bert_proj(bert).transpose(1, 2)
-        ja_bert_emb = self.ja_bert_proj(ja_bert).transpose(1, 2)
+        bert_emb = self._bert_embedding(self.bert_proj, bert)
+        ja_bert_emb = self._bert_embedding(self.ja_bert_proj, ja_bert)
         x = (
             self.emb(x)
             + self.tone_emb(tone)
@@ -484,6 +510,7 @@ class Generator(torch.nn.Module):
         super(Generator, self).__init__()
         self.num_kernels = len(resblock_kernel_sizes)
         self.num_upsamples = len(upsample_rates)
+        self.upsample_rates = upsample_rates
         self.conv_pre = Conv1d(
             initial_channel, upsample_initial_channel, 7, 1, padding=3
         )
@@ -517,27 +544,92 @@ class Generator(torch.nn.Module):
         if gin_channels != 0:
             self.cond = nn.Conv1d(gin_channels, upsample_initial_channel, 1)
 
-    def forward(self, x, g=None):
+    def forward(self, x, g=None, x_mask=None):
+        # x_mask: padded batches only. Zeroing the padded frames before every conv
+        # makes each item match an unpadded batch-of-one run.
         x = self.conv_pre(x)
         if g is not None:
             x = x + self.cond(g)
 
         for i in range(self.num_upsamples):
             x = F.leaky_relu(x, modules.LRELU_SLOPE)
+            if x_mask is not None:
+                x = x * x_mask
+                x_mask = x_mask.repeat_interleave(self.upsample_rates[i], dim=2)
             x = self.ups[i](x)
             xs = None
             for j in range(self.num_kernels):
                 if xs is None:
-                    xs = self.resblocks[i * self.num_kernels + j](x)
+                    xs = self.resblocks[i * self.num_kernels + j](x, x_mask)
                 else:
-                    xs += self.resblocks[i * self.num_kernels + j](x)
+                    xs += self.resblocks[i * self.num_kernels + j](x, x_mask)
             x = xs / self.num_kernels
         x = F.leaky_relu(x)
+        if x_mask is not None:
+            x = x * x_mask
         x = self.conv_post(x)
         x = torch.tanh(x)
 
         return x
 
+    def receptive_field(self):
+        """
+        One-sided receptive field of the generator in input frames, from the
+        layer configuration: output samples further than this many frames from
+        a chunk edge do not see the edge padding.
+        """
+        rf = self.conv_pre.padding[0]
+        scale = 1
+        for i, up in enumerate(self.ups):
+            k, u, p = up.kernel_size[0], up.stride[0], up.padding[0]
+            rf += math.ceil(max(p, k - 1 - p) / u) / scale
+            scale *= u
+            block_rf = max(
+                sum(m.padding[0] for m in block.modules() if isinstance(m, nn.Conv1d))
+                for block in self.resblocks[i * self.num_kernels:(i + 1) * self.num_kernels]
+            )
+            rf += block_rf / scale
+        rf += self.conv_post.padding[0] / scale
+        return math.ceil(rf)
+
+    def iter_chunks(self, x, g=None, x_mask=None, chunk_frames=128, overlap_frames=4, padding=None):
+        """
+        Decode ``x`` in time chunks of at most ``chunk_frames`` frames and yield
+        the waveform piece by piece. Each chunk is decoded with ``padding``
+        frames of context on both sides (default: the receptive field, which
+        makes the result match a full pass) and consecutive chunks overlap by
+        ``overlap_frames``, cross-faded linearly.
+        """
+        length = x.size(2)
+        if length <= chunk_frames:
+            yield self(x, g=g, x_mask=x_mask)
+            return
+        if not 0 <= overlap_frames < chunk_frames:
+            raise ValueError("overlap_frames must be in [0, chunk_frames)")
+
+        hop = math.prod(self.upsample_rates)
+        padding = self.receptive_field() if padding is None else padding
+        fade = overlap_frames * hop
+        fade_in = torch.linspace(0.0, 1.0, fade + 2, device=x.device, dtype=x.dtype)[1:-1]
+        tail = None
+
+        start = 0
+        while True:
+            end = min(start + chunk_frames, length)
+            lo, hi = max(start - padding, 0), min(end + padding, length)
+            mask = x_mask[:, :, lo:hi] if x_mask is not None else None
+            audio = self(x[:, :, lo:hi], g=g, x_mask=mask)[:, :, (start - lo) * hop:(end - lo) * hop]
+            if tail is not None:
+                audio = torch.cat([tail * (1 - fade_in) + audio[:, :, :fade] * fade_in, audio[:, :, fade:]], dim=2)
+            if end == length:
+                yield audio
+                return
+            # hold back the overlap so it can be blended with the next chunk
+            if fade:
+                audio, tail = audio[:, :, :-fade], audio[:, :, -fade:]
+            yield audio
+            start = end - overlap_frames
+
     def remove_weight_norm(self):
         print("Removing weight norm...")
         for layer in self.ups:
@@ -964,7 +1056,7 @@ class SynthesizerTrn(nn.Module):
             (x, logw, logw_),
         )
 
-    def infer(
+    def encode(
         self,
         x,
         x_lengths,
@@ -973,14 +1065,17 @@ class SynthesizerTrn(nn.Module):
         language,
         bert,
         ja_bert,
-        noise_scale=0.667,
-        length_scale=1,
         noise_scale_w=0.8,
-        max_len=None,
         sdp_ratio=0,
         y=None,
         g=None,
+        generator=None,
     ):
+        """
+        Stage 1: speaker embedding, text encoder and duration predictors.
+        Returns EncoderOutput(g, m_p, logs_p, x_mask, logw); everything after
+        it (speed, prior noise) can be re-rendered from it with ``render``.
+        """
         # x, m_p, logs_p, x_mask = self.enc_p(x, x_lengths, tone, language, bert)
         # g = self.gst(y)
         if g is None:
@@ -995,9 +1090,24 @@ class SynthesizerTrn(nn.Module):
         x, m_p, logs_p, x_mask = self.enc_p(
             x, x_lengths, tone, language, bert, ja_bert, g=g_p
         )
-        logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w) * (
-            sdp_ratio
-        ) + self.dp(x, x_mask, g=g) * (1 - sdp_ratio)
+        # a predictor weighted by 0 is skipped instead of computed and multiplied away
+        if sdp_ratio == 0:
+            logw = self.dp(x, x_mask, g=g)
+        elif sdp_ratio == 1:
+            logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w, generator=generator)
+        else:
+            logw = self.sdp(
+                x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w, generator=generator
+            ) * (sdp_ratio) + self.dp(x, x_mask, g=g) * (1 - sdp_ratio)
+        return EncoderOutput(g, m_p, logs_p, x_mask, logw)
+
+    @staticmethod
+    def expand(logw, x_mask, m_p, logs_p, length_scale=1, noise_scale=0.667, return_attn=False, generator=None):
+        """
+        Stage 2: round the durations, repeat each phone's prior over its
+        frames and sample the prior. Returns (z_p, y_mask, attn, m_p, logs_p)
+        with m_p / logs_p at frame rate; attn is only built with return_attn.
+        """
         w = torch.exp(logw) * x_mask * length_scale
         
         w_ceil = torch.ceil(w)
@@ -1005,22 +1115,129 @@ class SynthesizerTrn(nn.Module):
         y_mask = torch.unsqueeze(commons.sequence_mask(y_lengths, None), 1).to(
             x_mask.dtype
         )
-        attn_mask = torch.unsqueeze(x_mask, 2) * torch.unsqueeze(y_mask, -1)
-        attn = commons.generate_path(w_ceil, attn_mask)
-
-        m_p = torch.matmul(attn.squeeze(1), m_p.transpose(1, 2)).transpose(
-            1, 2
-        )  # [b, t', t], [b, t, d] -> [b, d, t']
-        logs_p = torch.matmul(attn.squeeze(1), logs_p.transpose(1, 2)).transpose(
-            1, 2
-        )  # [b, t', t], [b, t, d] -> [b, d, t']
-
-        z_p = m_p + torch.randn_like(m_p) * torch.exp(logs_p) * noise_scale
-        z = self.flow(z_p, y_mask, g=g, reverse=True)
-        o = self.dec((z * y_mask)[:, :, :max_len], g=g)
+        attn = None
+        if return_attn:
+            attn_mask = torch.unsqueeze(x_mask, 2) * torch.unsqueeze(y_mask, -1)
+            attn = commons.generate_path(w_ceil, attn_mask)
+
+        # repeat each phone's prior w_ceil times by index instead of a dense
+        # [b, t', t] alignment matmul
+        indices = commons.duration_to_indices(w_ceil, y_mask.size(2))
+        m_p = commons.expand_frames(m_p, indices) * y_mask  # [b, d, t']
+        logs_p = commons.expand_frames(logs_p, indices) * y_mask  # [b, d, t']
+
+        z_p = m_p + commons.randn_like(m_p, generator) * torch.exp(logs_p) * noise_scale
+        return z_p, y_mask, attn, m_p, logs_p
+
+    def flow_reverse(self, z_p, y_mask, g):
+        """Stage 3: prior sample -> decoder latent."""
+        return self.flow(z_p, y_mask, g=g, reverse=True)
+
+    def decode(self, z, y_mask, g, max_len=None):
+        """Stage 4: latent -> waveform [b, 1, t' * upsample]."""
+        dec_mask = y_mask[:, :, :max_len] if z.size(0) > 1 else None
+        return self.dec((z * y_mask)[:, :, :max_len], g=g, x_mask=dec_mask)
+
+    def _latent(self, encoded, noise_scale, length_scale, return_attn=False, generator=None):
+        z_p, y_mask, attn, m_p, logs_p = self.expand(
+            encoded.logw, encoded.x_mask, encoded.m_p, encoded.logs_p,
+            length_scale=length_scale, noise_scale=noise_scale, return_attn=return_attn, generator=generator,
+        )
+        z = self.flow_reverse(z_p, y_mask, encoded.g)
+        return z, y_mask, attn, (z_p, m_p, logs_p)
+
+    def render(self, encoded, noise_scale=0.667, length_scale=1, max_len=None, return_attn=False, generator=None):
+        """
+        Stages 2-4 on an ``encode`` output: the same result as ``infer``, so
+        the encoder and duration predictors run once per sentence however
+        many speeds / noise scales it is rendered at.
+        """
+        z, y_mask, attn, (z_p, m_p, logs_p) = self._latent(
+            encoded, noise_scale, length_scale, return_attn=return_attn, generator=generator
+        )
+        o = self.decode(z, y_mask, encoded.g, max_len=max_len)
         # print('max/min of o:', o.max(), o.min())
         return o, attn, y_mask, (z, z_p, m_p, logs_p)
 
+    def render_stream(self, encoded, chunk_frames=128, overlap_frames=4, noise_scale=0.667, length_scale=1, generator=None):
+        """``render`` yielding the waveform decoder chunk by decoder chunk (Generator.iter_chunks)."""
+        z, y_mask, _, _ = self._latent(encoded, noise_scale, length_scale, generator=generator)
+        dec_mask = y_mask if z.size(0) > 1 else None
+        yield from self.dec.iter_chunks(
+            z * y_mask, g=encoded.g, x_mask=dec_mask, chunk_frames=chunk_frames, overlap_frames=overlap_frames
+        )
+
+    def infer(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        max_len=None,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        return_attn=True,
+        generator=None,
+    ):
+        """
+        Returns (audio, attn, y_mask, (z, z_p, m_p, logs_p)). The dense
+        [b, 1, t', t] alignment ``attn`` is built by default; callers that
+        only need audio pass return_attn=False to skip it and get None. With a seeded CPU torch.Generator all sampling
+        (stochastic durations and the prior noise) draws from it, so the same
+        inputs and seed give the same waveform.
+        Equivalent to ``render(encode(...), ...)``.
+        """
+        encoded = self.encode(
+            x, x_lengths, sid, tone, language, bert, ja_bert,
+            noise_scale_w=noise_scale_w, sdp_ratio=sdp_ratio, y=y, g=g, generator=generator,
+        )
+        return self.render(
+            encoded, noise_scale=noise_scale, length_scale=length_scale, max_len=max_len,
+            return_attn=return_attn, generator=generator,
+        )
+
+    def infer_stream(
+        self, *args, chunk_frames=128, overlap_frames=4, noise_scale=0.667, length_scale=1, generator=None, **kwargs
+    ):
+        """
+        Same arguments as ``infer``; yields the waveform in pieces by decoding
+        the latent in chunks (Generator.iter_chunks), so decoder memory is
+        bounded by ``chunk_frames`` and audio is available before the whole
+        utterance is decoded.
+        """
+        encoded = self.encode(*args, generator=generator, **kwargs)
+        yield from self.render_stream(
+            encoded, chunk_frames=chunk_frames, overlap_frames=overlap_frames,
+            noise_scale=noise_scale, length_scale=length_scale, generator=generator,
+        )
+
+    def optimize_for_inference(self):
+        """
+        One-time inference folding: every weight-norm parametrization is
+        replaced by its computed weight (g * v / ||v|| once instead of every
+        forward), Dropout modules become Identity, and the model is put in
+        eval mode. Idempotent; call before loading a folded state_dict.
+        Fold before any copy.deepcopy of the model: copies share torch's
+        generated parametrized classes, so folding one copy would strip the
+        weight property from the others.
+        """
+        self.eval()
+        for module in self.modules():
+            remove_weight_norm(module)
+        for module in list(self.modules()):
+            for name, child in list(module.named_children()):
+                if isinstance(child, nn.Dropout):
+                    setattr(module, name, nn.Identity())
+        self.inference_optimized = True
+        return self
+
     def voice_conversion(self, y, y_lengths, sid_src, sid_tgt, tau=1.0):        
         g_src = sid_src
         g_tgt = sid_tgt
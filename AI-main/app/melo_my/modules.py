@@ -5,7 +5,7 @@ from torch.nn import functional as F
 
 from torch.nn import Conv1d
 # from torch.nn.utils import weight_norm, remove_weight_norm
-from torch.nn.utils import remove_weight_norm
+from torch.nn.utils import parametrize
 from torch.nn.utils.parametrizations import weight_norm
 
 from . import commons
@@ -13,6 +13,17 @@ from .commons import init_weights, get_padding
 from .transforms import piecewise_rational_quadratic_transform
 from .attentions import Encoder
 
+
+def remove_weight_norm(module, name="weight"):
+    """
+    Fold weight norm into a plain weight. Handles both the
+    parametrizations API used here and the older hook-based weight_norm.
+    """
+    if parametrize.is_parametrized(module, name):
+        parametrize.remove_parametrizations(module, name, leave_parametrized=True)
+    elif hasattr(module, name + "_g"):
+        torch.nn.utils.remove_weight_norm(module, name)
+
 LRELU_SLOPE = 0.1
 
 
@@ -213,11 +224,11 @@ class WN(torch.nn.Module):
 
     def remove_weight_norm(self):
         if self.gin_channels != 0:
-            torch.nn.utils.remove_weight_norm(self.cond_layer)
+            remove_weight_norm(self.cond_layer)
         for l in self.in_layers:
-            torch.nn.utils.remove_weight_norm(l)
+            remove_weight_norm(l)
         for l in self.res_skip_layers:
-            torch.nn.utils.remove_weight_norm(l)
+            remove_weight_norm(l)
 
 
 class ResBlock1(torch.nn.Module):
@@ -440,6 +451,11 @@ class ResidualCouplingLayer(nn.Module):
         x0, x1 = torch.split(x, [self.half_channels] * 2, 1)
         h = self.pre(x0) * x_mask
         h = self.enc(h, x_mask, g=g)
+        if reverse and self.mean_only:
+            # logs == 0 here, so exp(-logs) is 1 and the trailing mask already
+            # zeroes padded frames: (x1 - m) * x_mask is the whole inverse
+            x1 = (x1 - self.post(h)) * x_mask
+            return torch.cat([x0, x1], 1)
         stats = self.post(h) * x_mask
         if not self.mean_only:
             m, logs = torch.split(stats, [self.half_channels] * 2, 1)
@@ -565,6 +581,10 @@ class TransformerCouplingLayer(nn.Module):
         x0, x1 = torch.split(x, [self.half_channels] * 2, 1)
         h = self.pre(x0) * x_mask
         h = self.enc(h, x_mask, g=g)
+        if reverse and self.mean_only:
+            # same shortcut as ResidualCouplingLayer.forward
+            x1 = (x1 - self.post(h)) * x_mask
+            return torch.cat([x0, x1], 1)
         stats = self.post(h) * x_mask
         if not self.mean_only:
             m, logs = torch.split(stats, [self.half_channels] * 2, 1)
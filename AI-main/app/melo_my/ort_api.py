@@ -0,0 +1,40 @@
+import os
+
+from .api import TTS
+from .export import ONNX_GRAPHS, OnnxInference, export_onnx  # noqa: F401 (OnnxInference re-exported)
+
+
+class ORTTTS(TTS):
+    """
+    TTS with the synthesizer running on ONNX Runtime (same ``tts_to_file`` /
+    ``tts_iter`` interface). The graphs are exported from the checkpoint on
+    first use and kept in ``onnx_dir`` (by default next to the checkpoint,
+    tied to its size and mtime). The PyTorch model stays loaded for export
+    and as the eager fallback (``tts.model``); tests/test_onnx.py checks
+    parity and scripts/benchmark_onnx.py measures latency.
+    """
+
+    def __init__(self,
+                language,
+                device='cpu',
+                use_hf=True,
+                config_path=None,
+                ckpt_path=None,
+                onnx_dir=None,
+                intra_op_threads=0,
+                inter_op_threads=1):
+        super().__init__(language, device='cpu', use_hf=use_hf, config_path=config_path,
+                         ckpt_path=ckpt_path, optimize=True)
+
+        if onnx_dir is None:
+            folded = self.folded_checkpoint_path(ckpt_path)
+            if folded is None:
+                raise ValueError("onnx_dir is required when ckpt_path is not a local file")
+            onnx_dir = os.path.splitext(folded)[0].replace(".folded-", ".onnx-")
+        if not all(os.path.exists(os.path.join(onnx_dir, f"{name}.onnx")) for name in ONNX_GRAPHS):
+            export_onnx(self.model, onnx_dir)
+        self.onnx_dir = onnx_dir
+        self._runner = OnnxInference(
+            onnx_dir, self.hps.model.upsample_rates,
+            intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads, fallback=self.model,
+        )
@@ -0,0 +1,167 @@
+import contextlib
+import copy
+import logging
+import math
+import time
+
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+PRECISION_MODES = ("fp32", "int8", "bf16")
+
+
+class PointwiseConv1d(nn.Module):
+    """
+    A 1x1 Conv1d expressed as a Linear over channels, so dynamic int8
+    quantization (which handles nn.Linear but not nn.Conv1d) can be applied.
+    The bias is kept as a plain fp32 buffer so ``.bias`` still works for
+    callers such as TextEncoder._bert_embedding.
+    """
+
+    def __init__(self, conv):
+        super().__init__()
+        self.in_channels = conv.in_channels
+        self.out_channels = conv.out_channels
+        self.linear = nn.Linear(conv.in_channels, conv.out_channels, bias=False)
+        with torch.no_grad():
+            self.linear.weight.copy_(conv.weight[:, :, 0])
+        bias = conv.bias.detach().clone() if conv.bias is not None else torch.zeros(conv.out_channels)
+        self.register_buffer("bias", bias)
+
+    def forward(self, x):
+        return (self.linear(x.transpose(1, 2)) + self.bias).transpose(1, 2)
+
+
+def _is_pointwise(conv):
+    return (
+        type(conv) is nn.Conv1d
+        and conv.kernel_size == (1,)
+        and conv.stride == (1,)
+        and conv.dilation == (1,)
+        and conv.groups == 1
+        and conv.padding in ((0,), 0)
+    )
+
+
+def pointwise_convs_to_linear(module):
+    """Replace every plain 1x1 Conv1d under ``module`` with PointwiseConv1d (in place)."""
+    for name, child in list(module.named_children()):
+        if _is_pointwise(child) and not hasattr(child, "parametrizations"):
+            setattr(module, name, PointwiseConv1d(child))
+        else:
+            pointwise_convs_to_linear(child)
+    return module
+
+
+def quantize_int8(module):
+    """Dynamic int8 quantization of the Linear and 1x1 Conv1d layers of ``module``."""
+    pointwise_convs_to_linear(module)
+    return torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def bf16_supported():
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def resolve_precision(mode):
+    """Validate ``mode``; bf16 falls back to fp32 on CPUs without native bf16."""
+    mode = (mode or "fp32").lower()
+    if mode not in PRECISION_MODES:
+        raise ValueError(f"Unknown precision mode {mode!r}, expected one of {PRECISION_MODES}")
+    if mode == "bf16" and not bf16_supported():
+        logger.warning("bf16 is not supported on this CPU, using fp32")
+        return "fp32"
+    return mode
+
+
+def apply_precision(model, mode):
+    """
+    Apply a precision mode to a SynthesizerTrn at load time.
+    int8 quantizes TextEncoder and the TransformerCouplingBlock flow; bf16 is
+    applied at inference time via ``precision_context``.
+    """
+    mode = resolve_precision(mode)
+    if mode == "int8":
+        quantize_int8(model.enc_p)
+        quantize_int8(model.flow)
+    model.precision = mode
+    return mode
+
+
+def precision_context(model):
+    """Autocast context for inference under the model's precision mode."""
+    if getattr(model, "precision", "fp32") == "bf16":
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return contextlib.nullcontext()
+
+
+# ---- quality check ----
+
+def _mel_filterbank(sampling_rate, n_fft, n_mels, fmin=0.0, fmax=None):
+    fmax = fmax or sampling_rate / 2
+
+    def hz_to_mel(f):
+        return 2595.0 * math.log10(1.0 + f / 700.0)
+
+    mels = torch.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2)
+    hz = 700.0 * (10 ** (mels / 2595.0) - 1.0)
+    bins = torch.linspace(0, sampling_rate / 2, n_fft // 2 + 1)
+    lower, center, upper = hz[:-2, None], hz[1:-1, None], hz[2:, None]
+    up = (bins[None, :] - lower) / (center - lower)
+    down = (upper - bins[None, :]) / (upper - center)
+    return torch.clamp(torch.minimum(up, down), min=0.0)
+
+
+def log_mel(audio, sampling_rate, n_fft=1024, hop_length=256, n_mels=80):
+    audio = torch.as_tensor(audio, dtype=torch.float32).reshape(-1)
+    spec = torch.stft(
+        audio, n_fft, hop_length=hop_length, window=torch.hann_window(n_fft), return_complex=True
+    ).abs()
+    mel = _mel_filterbank(sampling_rate, n_fft, n_mels) @ spec
+    return torch.log(torch.clamp(mel, min=1e-5))
+
+
+def mel_distance(reference, candidate, sampling_rate, n_fft=1024, hop_length=256, n_mels=80):
+    """Mean absolute log-mel difference over the common length (lower is closer)."""
+    ref = log_mel(reference, sampling_rate, n_fft, hop_length, n_mels)
+    cand = log_mel(candidate, sampling_rate, n_fft, hop_length, n_mels)
+    frames = min(ref.shape[-1], cand.shape[-1])
+    return (ref[:, :frames] - cand[:, :frames]).abs().mean().item()
+
+
+def compare_precision(model, infer_args, mode, sampling_rate, repeats=3, candidate_args=None, **infer_kwargs):
+    """
+    Run ``model.infer(*infer_args)`` on the fp32 ``model`` and under ``mode``
+    on a copy of it (with ``candidate_args`` when the inputs differ too, e.g.
+    BERT features computed under ``mode``), and report mel distance, length
+    difference and speedup. Use noise_scale=0 / noise_scale_w=0 /
+    sdp_ratio=0 for a deterministic comparison.
+    """
+    if getattr(model, "precision", "fp32") != "fp32":
+        raise ValueError("compare_precision needs an fp32 reference model")
+    candidate = copy.deepcopy(model)
+    mode = apply_precision(candidate, mode)
+
+    def run(m, args):
+        with torch.no_grad(), precision_context(m):
+            m.infer(*args, **infer_kwargs)  # warm-up
+            started = time.perf_counter()
+            for _ in range(repeats):
+                audio = m.infer(*args, **infer_kwargs)[0][0, 0].float()
+            return audio, (time.perf_counter() - started) / repeats
+
+    reference, ref_seconds = run(model, infer_args)
+    output, seconds = run(candidate, candidate_args if candidate_args is not None else infer_args)
+    return {
+        "mode": mode,
+        "mel_distance": mel_distance(reference, output, sampling_rate),
+        "length_diff": output.shape[-1] - reference.shape[-1],
+        "fp32_seconds": ref_seconds,
+        "seconds": seconds,
+        "speedup": ref_seconds / seconds if seconds > 0 else float("inf"),
+    }
@@ -0,0 +1,177 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+
+from .precision import precision_context
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceJob:
+    __slots__ = ("phones", "tones", "lang_ids", "bert", "ja_bert", "speaker_id", "params", "seed", "future")
+
+    def __init__(self, phones, tones, lang_ids, bert, ja_bert, speaker_id, params, seed=None):
+        self.phones = phones
+        self.tones = tones
+        self.lang_ids = lang_ids
+        self.bert = bert
+        self.ja_bert = ja_bert
+        self.speaker_id = speaker_id
+        self.params = params
+        self.seed = seed
+        self.future = Future()
+
+
+class InferenceScheduler:
+    """
+    Micro-batching scheduler for SynthesizerTrn.infer.
+
+    Sentence jobs from concurrent requests are collected for up to
+    ``max_wait_ms`` (or until ``max_batch_size`` jobs are pending), padded
+    into one batch using ``x_lengths`` and run through a single ``infer``
+    call. The waveforms are split back per job using ``y_mask``.
+    Jobs are only batched together when their sampling parameters match;
+    seeded jobs always run alone so their noise does not depend on what they
+    were batched with.
+    """
+
+    def __init__(self, model, device="cpu", max_batch_size=8, max_wait_ms=5.0):
+        self.model = model
+        self.device = device
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.upsample_factor = int(np.prod(model.upsample_rates))
+
+        self.batches = 0
+        self.jobs = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="melo-infer-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, phones, tones, lang_ids, bert, ja_bert, speaker_id,
+               sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, length_scale=1.0, seed=None):
+        """Queue one sentence. Returns a Future resolving to a float32 numpy waveform."""
+        if self._closed:
+            raise RuntimeError("InferenceScheduler is closed")
+        job = InferenceJob(
+            phones, tones, lang_ids, bert, ja_bert, speaker_id,
+            (float(sdp_ratio), float(noise_scale), float(noise_scale_w), float(length_scale)),
+            seed=seed,
+        )
+        self._queue.put(job)
+        return job.future
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "avg_batch_size": self.jobs / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = self._collect(job)
+
+            groups = {}
+            for job in batch:
+                key = job.params if job.seed is None else job
+                groups.setdefault(key, []).append(job)
+            for jobs in groups.values():
+                jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+                if not jobs:
+                    continue
+                try:
+                    audios = self._infer_batch(jobs, *jobs[0].params, seed=jobs[0].seed)
+                except Exception as e:
+                    logger.exception("Batched inference failed")
+                    for job in jobs:
+                        job.future.set_exception(e)
+                    continue
+                for job, audio in zip(jobs, audios):
+                    job.future.set_result(audio)
+
+    @staticmethod
+    def _pad_stack(tensors, max_len):
+        present = [t for t in tensors if t is not None]
+        if not present:
+            # unused feature stream for every job (TextEncoder uses the projection bias)
+            return None
+        out = present[0].new_zeros((len(tensors), *present[0].shape[:-1], max_len))
+        for i, t in enumerate(tensors):
+            if t is not None:
+                out[i, ..., : t.shape[-1]] = t
+        return out
+
+    def _infer_batch(self, jobs, sdp_ratio, noise_scale, noise_scale_w, length_scale, seed=None):
+        device = self.device
+        generator = torch.Generator().manual_seed(seed) if seed is not None else None
+        lengths = [job.phones.size(0) for job in jobs]
+        max_len = max(lengths)
+
+        with torch.no_grad(), precision_context(self.model):
+            x = self._pad_stack([job.phones for job in jobs], max_len).to(device)
+            tones = self._pad_stack([job.tones for job in jobs], max_len).to(device)
+            lang_ids = self._pad_stack([job.lang_ids for job in jobs], max_len).to(device)
+            bert = self._pad_stack([job.bert for job in jobs], max_len)
+            ja_bert = self._pad_stack([job.ja_bert for job in jobs], max_len)
+            bert = bert.to(device) if bert is not None else None
+            ja_bert = ja_bert.to(device) if ja_bert is not None else None
+            x_lengths = torch.LongTensor(lengths).to(device)
+            speakers = torch.LongTensor([job.speaker_id for job in jobs]).to(device)
+
+            o, _, y_mask, _ = self.model.infer(
+                x,
+                x_lengths,
+                speakers,
+                tones,
+                lang_ids,
+                bert,
+                ja_bert,
+                sdp_ratio=sdp_ratio,
+                noise_scale=noise_scale,
+                noise_scale_w=noise_scale_w,
+                length_scale=length_scale,
+                return_attn=False,
+                generator=generator,
+            )
+            y_lengths = y_mask.sum([1, 2]).long().tolist()
+            audios = [
+                o[i, 0, : y_len * self.upsample_factor].data.cpu().float().numpy()
+                for i, y_len in enumerate(y_lengths)
+            ]
+
+        self.batches += 1
+        self.jobs += len(jobs)
+        return audios
@@ -34,3 +34,10 @@ def get_bert(norm_text, word2ph, language, device):
     lang_bert_func_map = {"KR": kr_bert}
     bert = lang_bert_func_map[language](norm_text, word2ph, device)
     return bert
+
+
+def get_bert_batch(norm_texts, word2phs, language, device):
+    from .korean import get_bert_feature_batch as kr_bert_batch
+
+    lang_bert_batch_func_map = {"KR": kr_bert_batch}
+    return lang_bert_batch_func_map[language](norm_texts, word2phs, device)
@@ -133,4 +133,16 @@ def g2p(norm_text):
 
 
 def get_bert_feature(text, word2ph, device='cuda'):
-    return korean_bert.get_bert_feature(text, word2ph, device=device)
\ No newline at end of file
+    return korean_bert.get_bert_feature(text, word2ph, device=device)
+
+
+def get_bert_feature_batch(texts, word2phs, device='cuda'):
+    return korean_bert.get_bert_feature_batch(texts, word2phs, device=device)
+
+
+def set_bert_precision(mode):
+    return korean_bert.set_precision(mode)
+
+
+def use_bert_precision(mode):
+    return korean_bert.use_precision(mode)
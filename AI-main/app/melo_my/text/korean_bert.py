@@ -1,10 +1,71 @@
+import contextlib
+
 import torch
-from transformers import BertTokenizerFast, BertModel
+from transformers import BertConfig, BertTokenizerFast, BertModel
 
 from ...utils.const import KR_MODEL_PATH
 
+# TTS uses hidden_states[HIDDEN_LAYER] only
+HIDDEN_LAYER = -3
+
+
+def load_truncated_bert(path, hidden_layer=HIDDEN_LAYER):
+    """
+    Load only the encoder layers needed to produce hidden_states[hidden_layer]
+    (no pooler), so that layer comes out as last_hidden_state and the later
+    layers are neither run nor kept in memory.
+    """
+    num_layers = BertConfig.from_pretrained(path).num_hidden_layers
+    keep = hidden_layer % (num_layers + 1)  # hidden_states has num_layers + 1 entries
+    return BertModel.from_pretrained(path, num_hidden_layers=keep, add_pooling_layer=False)
+
+
 tokenizer = BertTokenizerFast.from_pretrained(KR_MODEL_PATH)
-model = BertModel.from_pretrained(KR_MODEL_PATH).to('cpu')
+model = load_truncated_bert(KR_MODEL_PATH).to('cpu').eval()
+precision = "fp32"
+
+
+def _quantize(bert):
+    return torch.ao.quantization.quantize_dynamic(bert, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def set_precision(mode):
+    """fp32 / int8 (dynamic quantization of the Linear layers) / bf16 (autocast)."""
+    global model, precision
+    from ..precision import resolve_precision
+
+    mode = resolve_precision(mode)
+    if mode == "int8" and precision != "int8":
+        model = _quantize(model)
+    precision = mode
+    return mode
+
+
+@contextlib.contextmanager
+def use_precision(mode):
+    """
+    Run BERT under ``mode`` inside the block (for precision checks, not while
+    serving: the module-level model is swapped). fp32 weights are reloaded
+    from disk when the resident model is already quantized.
+    """
+    global model, precision
+    from ..precision import resolve_precision
+
+    saved = model, precision
+    mode = resolve_precision(mode)
+    if mode != precision:
+        fp32 = model if precision != "int8" else load_truncated_bert(KR_MODEL_PATH).to('cpu').eval()
+        model = _quantize(fp32) if mode == "int8" else fp32
+        precision = mode
+    try:
+        yield mode
+    finally:
+        model, precision = saved
+
+
+def _forward(inputs):
+    with torch.autocast("cpu", dtype=torch.bfloat16, enabled=precision == "bf16"):
+        return model(**inputs).last_hidden_state.float()
 
 
 def get_bert_feature(text, word2ph, device=None):
@@ -13,16 +74,36 @@ def get_bert_feature(text, word2ph, device=None):
         inputs = tokenizer(text, return_tensors="pt")
         for i in inputs:
             inputs[i] = inputs[i].to(device)
-        res = model(**inputs, output_hidden_states=True)
-        res = torch.cat(res["hidden_states"][-3:-2], -1)[0].cpu()
+        res = _forward(inputs)[0].cpu()
 
     assert inputs["input_ids"].shape[-1] == len(word2ph), f"{inputs['input_ids'].shape[-1]}/{len(word2ph)}"
-    word2phone = word2ph
-    phone_level_feature = []
-    for i in range(len(word2phone)):
-        repeat_feature = res[i].repeat(word2phone[i], 1)
-        phone_level_feature.append(repeat_feature)
+    return expand_to_phones(res, word2ph)
+
+
+def expand_to_phones(token_feature, word2ph):
+    """[tokens, H] token features -> [H, phones], each token repeated word2ph[i] times."""
+    repeats = torch.as_tensor(word2ph, dtype=torch.long, device=token_feature.device)
+    return token_feature.repeat_interleave(repeats, dim=0).T
 
-    phone_level_feature = torch.cat(phone_level_feature, dim=0)
 
-    return phone_level_feature.T
+def get_bert_feature_batch(texts, word2phs, device=None):
+    """
+    Batched get_bert_feature: one padded forward pass (with attention mask)
+    for all sentences, returning one phone-level feature matrix per sentence.
+    """
+    if not texts:
+        return []
+
+    with torch.no_grad():
+        inputs = tokenizer(list(texts), return_tensors="pt", padding=True)
+        for i in inputs:
+            inputs[i] = inputs[i].to(device)
+        res = _forward(inputs).cpu()
+        token_lengths = inputs["attention_mask"].sum(-1).tolist()
+
+    features = []
+    for b, word2phone in enumerate(word2phs):
+        # right padding: the first token_lengths[b] positions are the real tokens
+        assert token_lengths[b] == len(word2phone), f"{token_lengths[b]}/{len(word2phone)}"
+        features.append(expand_to_phones(res[b, : len(word2phone)], word2phone))
+    return features
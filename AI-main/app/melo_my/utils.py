@@ -2,7 +2,7 @@ import logging
 import json
 import torch
 
-from .text import cleaned_text_to_sequence, get_bert
+from .text import cleaned_text_to_sequence, get_bert, get_bert_batch
 from .text.cleaner import clean_text
 from . import commons
 
@@ -52,7 +52,7 @@ def get_hparams_from_file(config_path):
     hparams = HParams(**config)
     return hparams
 
-def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None):
+def _clean_for_infer(text, language_str, hps, symbol_to_id=None):
     norm_text, phone, tone, word2ph = clean_text(text, language_str)
     phone, tone, language = cleaned_text_to_sequence(phone, tone, language_str, symbol_to_id)
 
@@ -63,33 +63,88 @@ def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None):
         for i in range(len(word2ph)):
             word2ph[i] = word2ph[i] * 2
         word2ph[0] += 1
+    return norm_text, phone, tone, language, word2ph
 
-    if getattr(hps.data, "disable_bert", False):
-        bert = torch.zeros(1024, len(phone))
-        ja_bert = torch.zeros(768, len(phone))
+
+def _assemble_for_infer(bert, phone, tone, language, language_str):
+    # The unused feature stream is returned as None instead of a dense zero
+    # matrix; TextEncoder substitutes the projection bias for it.
+    if bert is None:
+        ja_bert = None
     else:
-        bert = get_bert(norm_text, word2ph, language_str, device)
-        del word2ph
-        assert bert.shape[-1] == len(phone), phone
+        assert bert.shape[-1] == len(phone), f"Bert seq len {bert.shape[-1]} != {len(phone)}"
 
         if language_str == "ZH":
             bert = bert
-            ja_bert = torch.zeros(768, len(phone))
+            ja_bert = None
         elif language_str in ["JP", "EN", "ZH_MIX_EN", 'KR', 'SP', 'ES', 'FR', 'DE', 'RU']:
             ja_bert = bert
-            bert = torch.zeros(1024, len(phone))
+            bert = None
         else:
             raise NotImplementedError()
 
-    assert bert.shape[-1] == len(
-        phone
-    ), f"Bert seq len {bert.shape[-1]} != {len(phone)}"
-
     phone = torch.LongTensor(phone)
     tone = torch.LongTensor(tone)
     language = torch.LongTensor(language)
     return bert, ja_bert, phone, tone, language
 
+
+def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None, feature_cache=None):
+    if feature_cache is not None:
+        cache_key = feature_cache.key(text, language_str, hps, symbol_to_id, feature_cache.precision)
+        cached = feature_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    norm_text, phone, tone, language, word2ph = _clean_for_infer(text, language_str, hps, symbol_to_id)
+
+    if getattr(hps.data, "disable_bert", False):
+        bert = None
+    else:
+        bert = get_bert(norm_text, word2ph, language_str, device)
+        del word2ph
+
+    features = _assemble_for_infer(bert, phone, tone, language, language_str)
+    if feature_cache is not None:
+        # what later hits return, so a sentence synthesizes the same on every call
+        features = feature_cache.put(cache_key, *features)
+    return features
+
+
+def get_text_for_tts_infer_batch(texts, language_str, hps, device, symbol_to_id=None, feature_cache=None):
+    """
+    get_text_for_tts_infer for several sentences: BERT runs once over the
+    sentences that miss the feature cache, as one padded batch.
+    """
+    results = [None] * len(texts)
+    cache_keys = [None] * len(texts)
+    misses = []
+    for i, text in enumerate(texts):
+        if feature_cache is not None:
+            cache_keys[i] = feature_cache.key(text, language_str, hps, symbol_to_id, feature_cache.precision)
+            results[i] = feature_cache.get(cache_keys[i])
+        if results[i] is None:
+            misses.append((i, _clean_for_infer(text, language_str, hps, symbol_to_id)))
+
+    if not misses:
+        return results
+
+    if getattr(hps.data, "disable_bert", False):
+        berts = [None] * len(misses)
+    else:
+        berts = get_bert_batch(
+            [cleaned[0] for _, cleaned in misses],
+            [cleaned[4] for _, cleaned in misses],
+            language_str,
+            device,
+        )
+
+    for (i, (_, phone, tone, language, _)), bert in zip(misses, berts):
+        results[i] = _assemble_for_infer(bert, phone, tone, language, language_str)
+        if feature_cache is not None:
+            results[i] = feature_cache.put(cache_keys[i], *results[i])
+    return results
+
 # def load_checkpoint(checkpoint_path, model, optimizer=None, skip_optimizer=False):
 #     assert os.path.isfile(checkpoint_path)
 #     checkpoint_dict = torch.load(checkpoint_path, map_location="cpu")
@@ -1,10 +1,15 @@
-import requests
+import httpx
+import hashlib
 import logging
 import json
 import random
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from ..core.setting import settings
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
+from .conversation_store import ConversationStore
+from ..utils.const import CONVERSATION_DB_PATH
 
 url = "https://api.openai.com/v1/chat/completions"
 
@@ -15,6 +20,76 @@ headers = {
 
 logger = logging.getLogger(__name__)
 
+# 반복 질문용 응답 캐시 (완전 일치 + n-gram 유사 일치)
+response_cache = ResponseCache(
+    ttl_seconds=settings.response_cache_ttl,
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+    similarity_threshold=settings.response_cache_similarity,
+)
+
+# 동시에 들어온 같은 질문은 업스트림 호출 하나로 합침
+chat_flight = SingleFlight()
+
+# 대화방별 기록 (SQLite + 최근 대화 LRU)
+conversation_store = ConversationStore(
+    settings.conversation_db_path or CONVERSATION_DB_PATH,
+    max_rooms=settings.conversation_max_rooms,
+    window_turns=settings.conversation_window_turns,
+    token_budget=settings.conversation_token_budget,
+)
+
+# lifespan 에서 생성/종료되는 공유 HTTP 클라이언트 (커넥션 풀 + keep-alive)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_keepalive,
+        keepalive_expiry=settings.openai_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=httpx.Timeout(settings.openai_timeout),
+        limits=limits,
+        http2=_http2_available(),
+    )
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """OpenAI 호출용 공유 AsyncClient 를 생성합니다. lifespan 시작 시 호출됩니다."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _create_http_client()
+        logger.info(f"OpenAI HTTP 클라이언트 생성 (http2={_http2_available()})")
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """공유 AsyncClient 를 닫습니다. lifespan 종료 시 호출됩니다."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("OpenAI HTTP 클라이언트 종료")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """공유 AsyncClient 를 반환합니다. lifespan 밖(스크립트 등)에서는 지연 생성합니다."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _create_http_client()
+    return _http_client
+
 # 오프라인 모드용 응답
 OFFLINE_RESPONSES: List[str] = [
     "안녕하세요! 무엇을 도와드릴까요?",
@@ -28,6 +103,19 @@ OFFLINE_RESPONSES: List[str] = [
     "도와드릴 일이 있으면 말씀해주세요."
 ]
 
+# 오프라인 키워드 응답 (앞에서부터 먼저 일치하는 항목 사용)
+OFFLINE_KEYWORD_RESPONSES: List[Tuple[Tuple[str, ...], Optional[str]]] = [
+    (("안녕", "반가"), "안녕하세요! 무엇을 도와드릴까요?"),
+    (("이름", "누구"), "저는 동행 서비스의 AI 도우미 '금복이'입니다. 무엇을 도와드릴까요?"),
+    (("도움", "도와"), "네, 어떤 도움이 필요하신가요? 더 자세히 말씀해주세요."),
+    (("시간", "날짜", "몇 시"), None),  # OFFLINE_TIME_FORMAT 으로 현재 시간 응답
+    (("감사", "고마"), "천만에요! 더 필요한 것이 있으면 말씀해주세요."),
+]
+
+OFFLINE_TIME_FORMAT = "현재 시간은 %Y년 %m월 %d일 %H시 %M분입니다."
+
+OFFLINE_ERROR_RESPONSE = "죄송합니다. 내부 오류가 발생했습니다. 나중에 다시 시도해 주세요."
+
 def get_offline_response(contents: str) -> str:
     """오프라인 모드에서 간단한 응답을 생성합니다."""
     if not contents:
@@ -37,64 +125,102 @@ def get_offline_response(contents: str) -> str:
         # 간단한 키워드 매칭
         contents_lower = contents.lower()
         
-        if "안녕" in contents_lower or "반가" in contents_lower:
-            return "안녕하세요! 무엇을 도와드릴까요?"
-        
-        if "이름" in contents_lower or "누구" in contents_lower:
-            return "저는 동행 서비스의 AI 도우미 '금복이'입니다. 무엇을 도와드릴까요?"
-            
-        if "도움" in contents_lower or "도와" in contents_lower:
-            return "네, 어떤 도움이 필요하신가요? 더 자세히 말씀해주세요."
-            
-        if "시간" in contents_lower or "날짜" in contents_lower or "몇 시" in contents_lower:
-            from datetime import datetime
-            now = datetime.now()
-            return f"현재 시간은 {now.strftime('%Y년 %m월 %d일 %H시 %M분')}입니다."
-            
-        if "감사" in contents_lower or "고마" in contents_lower:
-            return "천만에요! 더 필요한 것이 있으면 말씀해주세요."
+        for keywords, response in OFFLINE_KEYWORD_RESPONSES:
+            if any(keyword in contents_lower for keyword in keywords):
+                if response is None:
+                    from datetime import datetime
+                    return datetime.now().strftime(OFFLINE_TIME_FORMAT)
+                return response
             
         # 랜덤 응답
         return random.choice(OFFLINE_RESPONSES)
     except Exception as e:
         logger.error(f"오프라인 응답 생성 오류: {str(e)}")
-        return "죄송합니다. 내부 오류가 발생했습니다. 나중에 다시 시도해 주세요."
+        return OFFLINE_ERROR_RESPONSE
+
+def get_offline_phrases() -> List[str]:
+    """오프라인 모드에서 나올 수 있는 고정 문구 전체 (시간 응답 제외, TTS 사전 합성용)"""
+    phrases = list(OFFLINE_RESPONSES)
+    phrases.extend(response for _, response in OFFLINE_KEYWORD_RESPONSES if response is not None)
+    phrases.append(OFFLINE_ERROR_RESPONSE)
+    return list(dict.fromkeys(phrases))
+
+def is_offline() -> bool:
+    """오프라인 모드이거나 API 키가 없으면 True"""
+    return settings.offline_mode or settings.openai_api_key == "dummy-key"
+
+def build_request_data(contents: str, stream: bool = False, history: Optional[List[Dict[str, str]]] = None) -> dict:
+    """Chat Completions 요청 본문을 만듭니다. history 는 시스템 프롬프트와 사용자 입력 사이에 들어갑니다."""
+    data = {
+        "model": settings.default_model,
+        "messages": [
+            {
+                "role": "system",
+                "content": settings.system_prompt
+            },
+            *(history or []),
+            {
+                "role": "user",
+                "content": contents
+            }
+        ]
+    }
+    if stream:
+        data["stream"] = True
+    return data
+
+def cache_scope() -> str:
+    """모델/시스템 프롬프트가 바뀌면 다른 캐시 영역을 쓰도록 하는 키"""
+    prompt_hash = hashlib.sha1(settings.system_prompt.encode("utf-8")).hexdigest()[:12]
+    return f"{settings.default_model}:{prompt_hash}"
+
+def get_cached_response(contents: str) -> Optional[str]:
+    if not settings.response_cache_enabled:
+        return None
+    return response_cache.get(contents, scope=cache_scope())
 
-def get_chatbot_response(contents: str) -> str:
+def store_cached_response(contents: str, response: str) -> None:
+    if settings.response_cache_enabled:
+        response_cache.put(contents, response, scope=cache_scope())
+
+async def get_chatbot_response(contents: str, history: Optional[List[Dict[str, str]]] = None) -> str:
     """
     챗봇 응답을 생성합니다.
     오프라인 모드이거나 API 키가 없으면 로컬 응답을 생성합니다.
+    history(이전 대화)가 있으면 문맥에 따라 답이 달라지므로 캐시와 요청 병합을 쓰지 않습니다.
     """
     # 오프라인 모드 확인
-    if settings.offline_mode or settings.openai_api_key == "dummy-key":
+    if is_offline():
         logger.info("오프라인 모드에서 응답 생성")
         return get_offline_response(contents)
     
-    # 온라인 모드 (OpenAI API 사용)
+    if history:
+        return await request_chat_completion(contents, history)
+    
+    # 캐시 확인
+    cached = get_cached_response(contents)
+    if cached is not None:
+        logger.info(f"캐시된 응답 반환: {contents}")
+        return cached
+    
+    # 온라인 모드 (OpenAI API 사용) - 동일 요청은 하나의 호출을 공유
+    flight_key = (settings.default_model, settings.system_prompt, response_cache.normalize(contents))
+    return await chat_flight.do(flight_key, lambda: request_chat_completion(contents))
+
+async def request_chat_completion(contents: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+    """OpenAI Chat Completions 를 한 번 호출하고, 실패하면 오프라인 응답을 반환합니다."""
     try:
         # API 요청 데이터 준비
-        data = {
-            "model": settings.default_model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": settings.system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": contents
-                }
-            ]
-        }
+        data = build_request_data(contents, history=history)
         
         # 로깅
         logger.info(f"OpenAI API 요청: {contents}")
         
         # API 호출
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = await get_http_client().post(url, json=data)
         
         # 응답 상태 확인
-        if not response.ok:
+        if not response.is_success:
             logger.error(f"OpenAI API 오류: 상태 코드 {response.status_code}, 응답: {response.text}")
             return f"죄송합니다. 응답을 생성하는 데 문제가 발생했습니다. (오류 코드: {response.status_code})"
         
@@ -108,6 +234,8 @@ def get_chatbot_response(contents: str) -> str:
         if 'choices' in response_data and len(response_data['choices']) > 0:
             if 'message' in response_data['choices'][0] and 'content' in response_data['choices'][0]['message']:
                 message = response_data['choices'][0]['message']['content']
+                if not history:
+                    store_cached_response(contents, message)
                 return message
             else:
                 logger.error("OpenAI API 응답 형식 오류: choices[0].message.content가 없습니다.")
@@ -116,12 +244,76 @@ def get_chatbot_response(contents: str) -> str:
             logger.error(f"OpenAI API 응답 형식 오류: 'choices' 키가 없거나 비어 있습니다. 응답: {json.dumps(response_data, ensure_ascii=False)}")
             return get_offline_response(contents)
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.error("OpenAI API 타임아웃")
         return get_offline_response(contents)
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"OpenAI API 요청 오류: {str(e)}")
         return get_offline_response(contents)
     except Exception as e:
         logger.error(f"예상치 못한 오류: {str(e)}")
-        return get_offline_response(contents)
\ No newline at end of file
+        return get_offline_response(contents)
+
+async def stream_chatbot_response(contents: str, history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+    """
+    챗봇 응답을 토큰(delta) 단위로 생성합니다.
+    업스트림의 stream=true SSE 를 그대로 중계하며, 첫 delta 이전에 실패하면
+    오프라인 응답을 한 번에 내보냅니다. 중간에 예상치 못한 오류가 나면
+    예외 대신 OFFLINE_ERROR_RESPONSE 를 마지막 delta 로 보냅니다.
+    """
+    if is_offline():
+        logger.info("오프라인 모드에서 스트리밍 응답 생성")
+        yield get_offline_response(contents)
+        return
+
+    cached = None if history else get_cached_response(contents)
+    if cached is not None:
+        logger.info(f"캐시된 응답 반환: {contents}")
+        yield cached
+        return
+
+    sent_any = False
+    parts: List[str] = []
+    try:
+        logger.info(f"OpenAI API 스트리밍 요청: {contents}")
+        data = build_request_data(contents, stream=True, history=history)
+
+        async with get_http_client().stream("POST", url, json=data) as response:
+            if not response.is_success:
+                body = await response.aread()
+                logger.error(f"OpenAI API 오류: 상태 코드 {response.status_code}, 응답: {body.decode('utf-8', 'replace')}")
+                yield f"죄송합니다. 응답을 생성하는 데 문제가 발생했습니다. (오류 코드: {response.status_code})"
+                return
+
+            async for line in response.aiter_lines():
+                # SSE 형식: "data: {...}" / "data: [DONE]"
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    if not history:
+                        store_cached_response(contents, "".join(parts))
+                    break
+                try:
+                    chunk = json.loads(payload)
+                    delta = chunk["choices"][0].get("delta", {}).get("content")
+                except (ValueError, KeyError, IndexError):
+                    logger.error(f"OpenAI API 스트림 형식 오류: {payload[:200]}")
+                    continue
+                if delta:
+                    sent_any = True
+                    parts.append(delta)
+                    yield delta
+
+    except httpx.TimeoutException:
+        logger.error("OpenAI API 스트리밍 타임아웃")
+        if not sent_any:
+            yield get_offline_response(contents)
+    except httpx.HTTPError as e:
+        logger.error(f"OpenAI API 스트리밍 요청 오류: {str(e)}")
+        if not sent_any:
+            yield get_offline_response(contents)
+    except Exception as e:
+        # 스트림 경계: 어떤 오류든 예외로 끊지 않고 마지막 delta 로 오류 메시지를 보냄
+        logger.error(f"OpenAI API 스트리밍 중 예상치 못한 오류: {str(e)}", exc_info=True)
+        yield get_offline_response(contents) if not sent_any else OFFLINE_ERROR_RESPONSE
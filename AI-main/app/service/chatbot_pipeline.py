@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+from typing import Dict
+
+from .chat_bot_service import get_chatbot_response
+
+logger = logging.getLogger(__name__)
+
+
+class PathMetrics:
+    """경로별 호출 수, 오류 수, 지연 시간 집계"""
+
+    __slots__ = ("requests", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float, error: bool) -> None:
+        self.requests += 1
+        if error:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.requests, 2) if self.requests else 0.0,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+_metrics: Dict[str, PathMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def _metrics_for(path: str) -> PathMetrics:
+    metrics = _metrics.get(path)
+    if metrics is None:
+        with _metrics_lock:
+            metrics = _metrics.setdefault(path, PathMetrics())
+    return metrics
+
+
+async def run_chatbot_pipeline(path: str, contents: str, client_host: str = "unknown") -> str:
+    """
+    모든 챗봇 채팅 경로가 공유하는 처리 흐름
+    (로깅 → 캐시/요청 병합/업스트림 호출 → 경로별 지표 기록)
+    """
+    logger.info("챗봇 API 호출 [%s] - 클라이언트: %s, 입력: %s", path, client_host, contents)
+    started = time.perf_counter()
+    error = False
+    try:
+        response = await get_chatbot_response(contents)
+        logger.info("챗봇 응답 [%s]: %.100s...", path, response)
+        return response
+    except Exception:
+        error = True
+        raise
+    finally:
+        _metrics_for(path).record((time.perf_counter() - started) * 1000, error)
+
+
+def get_pipeline_metrics() -> Dict[str, dict]:
+    return {path: metrics.to_dict() for path, metrics in list(_metrics.items())}
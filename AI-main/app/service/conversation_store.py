@@ -0,0 +1,247 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversation_room (
+    room_no INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_name TEXT,
+    user_id INTEGER,
+    created_at TEXT NOT NULL,
+    last_conversation_time TEXT,
+    summary TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS conversation_turn (
+    turn_no INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_no INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversation_turn_room ON conversation_turn (room_no, turn_no);
+CREATE INDEX IF NOT EXISTS idx_conversation_room_last ON conversation_room (last_conversation_time);
+"""
+
+SENTENCE_END = re.compile(r"(?<=[.!?。])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 대략적인 토큰 수 (한글 1글자 ≈ 1토큰, 영문 3~4글자 ≈ 1토큰)"""
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class _RoomState:
+    __slots__ = ("room_no", "created_at", "last_time", "summary", "window", "window_tokens")
+
+    def __init__(self, room_no: int, created_at: str, last_time: Optional[str], summary: str):
+        self.room_no = room_no
+        self.created_at = created_at
+        self.last_time = last_time
+        self.summary = summary
+        # (role, content, tokens) - 최근 대화만 보관
+        self.window: Deque[Tuple[str, str, int]] = deque()
+        self.window_tokens = 0
+
+
+class ConversationStore:
+    """
+    대화방별 대화 기록 저장소
+    - 전체 기록은 로컬 SQLite(WAL) 에 저장
+    - 최근 대화 창(window)과 요약은 프로세스 내 LRU 로 유지
+    - 토큰 예산을 넘는 오래된 대화는 요약으로 접어 넣으므로 프롬프트 크기가 일정하게 유지됩니다.
+    컨텍스트 구성은 창 크기에만 비례하며 전체 기록 길이와 무관합니다.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_rooms: int = 256,
+        window_turns: int = 12,
+        token_budget: int = 1500,
+        summary_max_chars: int = 600,
+    ):
+        self.db_path = db_path
+        self.max_rooms = max_rooms
+        self.window_turns = window_turns
+        self.token_budget = token_budget
+        self.summary_max_chars = summary_max_chars
+
+        self._rooms: "OrderedDict[int, _RoomState]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ---- 연결 관리 ----
+    def open(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                return
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+            self._conn = conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._rooms.clear()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    # ---- 대화방 ----
+    def create_room(self, room_name: Optional[str] = None, user_id: Optional[int] = None) -> Dict:
+        with self._lock:
+            created_at = _now()
+            cursor = self.conn.execute(
+                "INSERT INTO conversation_room (room_name, user_id, created_at) VALUES (?, ?, ?)",
+                (room_name, user_id, created_at),
+            )
+            self.conn.commit()
+            room = _RoomState(cursor.lastrowid, created_at, None, "")
+            self._remember(room)
+            return self._room_info(room)
+
+    def get_room(self, room_no: int) -> Optional[Dict]:
+        with self._lock:
+            room = self._load_room(room_no)
+            return self._room_info(room) if room else None
+
+    def last_conversation_time(self, user_id: Optional[int] = None) -> Optional[str]:
+        with self._lock:
+            if user_id is None:
+                row = self.conn.execute(
+                    "SELECT MAX(last_conversation_time) AS last_time FROM conversation_room"
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT MAX(last_conversation_time) AS last_time FROM conversation_room WHERE user_id = ?",
+                    (user_id,),
+                ).fetchone()
+            return row["last_time"] if row else None
+
+    # ---- 대화 기록 ----
+    def build_context(self, room_no: int) -> List[Dict[str, str]]:
+        """요약 + 최근 대화 창을 Chat Completions 메시지 목록으로 반환합니다."""
+        with self._lock:
+            room = self._load_room(room_no)
+            if room is None:
+                return []
+            messages = []
+            if room.summary:
+                messages.append({"role": "system", "content": f"이전 대화 요약:\n{room.summary}"})
+            messages.extend({"role": role, "content": content} for role, content, _ in room.window)
+            return messages
+
+    def append_exchange(self, room_no: int, user_text: str, assistant_text: str) -> bool:
+        """
+        사용자 입력과 챗봇 응답 한 쌍을 저장합니다.
+        create_room 으로 만든 방에만 저장하며, 없는 방 번호면 저장하지 않고 False 를 반환합니다.
+        """
+        with self._lock:
+            room = self._load_room(room_no)
+            if room is None:
+                return False
+            now = _now()
+            turns = [("user", user_text), ("assistant", assistant_text)]
+            self.conn.executemany(
+                "INSERT INTO conversation_turn (room_no, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [(room_no, role, content, now) for role, content in turns],
+            )
+            for role, content in turns:
+                tokens = estimate_tokens(content)
+                room.window.append((role, content, tokens))
+                room.window_tokens += tokens
+            evicted = self._trim_window(room)
+            if evicted:
+                room.summary = self._fold_into_summary(room.summary, evicted)
+            room.last_time = now
+            self.conn.execute(
+                "UPDATE conversation_room SET last_conversation_time = ?, summary = ? WHERE room_no = ?",
+                (now, room.summary, room_no),
+            )
+            self.conn.commit()
+            return True
+
+    # ---- 내부 구현 ----
+    def _trim_window(self, room: _RoomState) -> List[Tuple[str, str, int]]:
+        evicted = []
+        while room.window and (
+            len(room.window) > self.window_turns or room.window_tokens > self.token_budget
+        ):
+            turn = room.window.popleft()
+            room.window_tokens -= turn[2]
+            evicted.append(turn)
+        return evicted
+
+    def _fold_into_summary(self, summary: str, evicted: List[Tuple[str, str, int]]) -> str:
+        """창에서 밀려난 대화를 첫 문장 위주로 요약에 덧붙이고, 길이를 제한합니다."""
+        lines = summary.splitlines() if summary else []
+        for role, content, _ in evicted:
+            first = SENTENCE_END.split(content.strip(), maxsplit=1)[0]
+            limit = 80 if role == "user" else 50
+            if len(first) > limit:
+                first = first[:limit] + "…"
+            lines.append(f"{'사용자' if role == 'user' else '금복이'}: {first}")
+        while lines and sum(len(line) + 1 for line in lines) > self.summary_max_chars:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _load_room(self, room_no: int) -> Optional[_RoomState]:
+        room = self._rooms.get(room_no)
+        if room is not None:
+            self._rooms.move_to_end(room_no)
+            return room
+
+        row = self.conn.execute(
+            "SELECT room_no, created_at, last_conversation_time, summary FROM conversation_room WHERE room_no = ?",
+            (room_no,),
+        ).fetchone()
+        if row is None:
+            return None
+        room = _RoomState(row["room_no"], row["created_at"], row["last_conversation_time"], row["summary"])
+        # 최근 창만 읽어옴 (전체 기록을 읽지 않음)
+        rows = self.conn.execute(
+            "SELECT role, content FROM conversation_turn WHERE room_no = ? ORDER BY turn_no DESC LIMIT ?",
+            (room_no, self.window_turns),
+        ).fetchall()
+        for r in reversed(rows):
+            tokens = estimate_tokens(r["content"])
+            room.window.append((r["role"], r["content"], tokens))
+            room.window_tokens += tokens
+        # 저장된 요약에 이미 반영된 턴이므로 예산 초과분은 버리기만 함
+        self._trim_window(room)
+        self._remember(room)
+        return room
+
+    def _remember(self, room: _RoomState) -> None:
+        self._rooms[room.room_no] = room
+        self._rooms.move_to_end(room.room_no)
+        while len(self._rooms) > self.max_rooms:
+            self._rooms.popitem(last=False)
+
+    @staticmethod
+    def _room_info(room: _RoomState) -> Dict:
+        return {
+            "conversationRoomNo": room.room_no,
+            "created_at": room.created_at,
+            "last_time": room.last_time,
+        }
@@ -1,32 +1,161 @@
-import soundfile as sf
 import os
-import io
+from typing import Optional, Tuple
 
 from app.melo_my.api import TTS
 from app.utils.preprcessing import preprocess_text
-from app.utils.const import KR
+from app.utils.const import KR, OUTPUT_PATH
+from app.utils.audio import pcm16_to_wav, to_pcm16, wav_header
+from app.core.setting import settings
+from app.service.tts_executor import TTSExecutor
+from app.service.tts_audio_cache import TTSAudioCache, audio_cache_key, file_checksum
+from app.service.tts_warm_bank import WarmAudioBank
+
+# 합성 파라미터 (캐시 키에 모두 포함)
+SDP_RATIO = 0.2
+NOISE_SCALE = 0.6
+NOISE_SCALE_W = 0.8
+SPEED = 1.0
+SEED = settings.tts_seed if settings.tts_seed >= 0 else None
 
 model = TTS(language=KR["language"], 
             device='cpu',
             config_path=os.path.join(KR["path"], "config.json"),
-            ckpt_path=os.path.join(KR["path"], "checkpoint.pth")
+            ckpt_path=os.path.join(KR["path"], "checkpoint.pth"),
+            optimize=settings.tts_optimize,
             )
 speaker_ids = model.hps.data.spk2id
+model_checksum = file_checksum(os.path.join(KR["path"], "checkpoint.pth"))
+
+# 추론 정밀도 (int8 동적 양자화 / bf16 autocast)
+# 시작 시 fp32 와 비교해 멜 거리가 허용치를 넘으면 fp32 로 유지
+# bf16 미지원 CPU 에서도 fp32 로 바뀌므로 실제 적용된 값을 캐시 키에 사용
+PRECISION_CHECK_TEXT = "안녕하세요. 오늘 점심 값으로 만 원을 썼어요."
+TTS_PRECISION = "fp32"
+if settings.tts_precision != "fp32":
+    TTS_PRECISION, _ = model.set_checked_precision(
+        settings.tts_precision,
+        PRECISION_CHECK_TEXT,
+        speaker_ids[KR["speaker"]],
+        settings.tts_precision_max_mel_distance,
+    )
+# 실행 방식 (캐시 키에 포함)
+TTS_BACKEND = (settings.tts_compile or "eager") + ("-folded" if settings.tts_optimize else "")
+
+# 길이 구간별로 트레이스한 그래프로 추론 (static/temp/tts_compiled 에 저장, 다음 시작 시 재사용)
+if settings.tts_compile:
+    model.enable_compiled_inference(
+        backend=settings.tts_compile,
+        cache_dir=os.path.join(OUTPUT_PATH, "tts_compiled"),
+    )
+
+# 동시 요청의 문장들을 모아 한 번에 추론 (TTS_MAX_BATCH_SIZE=1 이면 기존 단건 추론)
+if settings.tts_max_batch_size > 1:
+    model.enable_batching(settings.tts_max_batch_size, settings.tts_max_batch_wait_ms)
+
+# 긴 문장은 잠재 프레임을 나눠 디코딩하며 조각 단위로 스트리밍 (메모리 상한, 첫 음성까지 시간 단축)
+if settings.tts_max_chunk_frames > 0:
+    model.enable_chunked_decoding(settings.tts_max_chunk_frames)
+
+# 반복 문장은 G2P 와 BERT 를 다시 돌리지 않음 (메모리 LRU + static/temp/tts_features)
+if settings.tts_feature_cache_entries > 0:
+    model.enable_feature_cache(
+        max_entries=settings.tts_feature_cache_entries,
+        directory=os.path.join(OUTPUT_PATH, "tts_features"),
+        disk_max_bytes=settings.tts_feature_cache_disk_bytes,
+    )
+
+# 같은 문장을 다른 속도(느린 말하기 등)나 노이즈로 다시 합성할 때 인코더를 건너뜀
+# (마이크로 배칭이 켜져 있으면 미사용 - TTS_MAX_BATCH_SIZE=1 필요, SDP_RATIO > 0 이면 TTS_SEED 를 고정해야 적중)
+if settings.tts_encoder_cache_entries > 0:
+    model.enable_encoder_cache(settings.tts_encoder_cache_entries)
+
+# 합성은 이벤트 루프가 아닌 전용 워커 풀에서 실행 (대기열 초과 시 429)
+tts_executor = TTSExecutor(
+    workers=settings.tts_workers,
+    max_queue=settings.tts_max_queue,
+    torch_threads=settings.tts_torch_threads,
+)
+
+# 합성 결과 캐시 (메모리 LRU + static/temp/tts_cache)
+tts_audio_cache = TTSAudioCache(
+    os.path.join(OUTPUT_PATH, "tts_cache"),
+    memory_max_bytes=settings.tts_cache_memory_bytes,
+    disk_max_bytes=settings.tts_cache_disk_bytes,
+) if settings.tts_cache_enabled else None
+
+def synthesize_pcm(contents: str) -> bytes:
+    """전체 문장을 PCM16 으로 합성 (문장 사이/끝 무음 포함)"""
+    return b"".join(
+        to_pcm16(chunk)
+        for chunk in model.tts_iter(
+            preprocess_text(contents),
+            speaker_ids[KR["speaker"]],
+            sdp_ratio=SDP_RATIO,
+            noise_scale=NOISE_SCALE,
+            noise_scale_w=NOISE_SCALE_W,
+            speed=SPEED,
+            seed=SEED,
+        )
+    )
+
+
+# 오프라인/인사 고정 문구 사전 합성 (lifespan 에서 warm)
+warm_audio_bank = WarmAudioBank(synthesize_pcm, model.hps.data.sampling_rate)
+
+
+def get_audio_cache_key(contents: str) -> str:
+    return audio_cache_key(
+        contents, speaker_ids[KR["speaker"]], SDP_RATIO, NOISE_SCALE, NOISE_SCALE_W, SPEED, model_checksum, SEED,
+        precision=TTS_PRECISION, backend=TTS_BACKEND,
+    )
+
+
+def get_cached_audio(contents: str) -> Tuple[Optional[str], Optional[bytes], Optional[str]]:
+    """
+    캐시 조회 → (키, 메모리 적중 바이트, 디스크 적중 경로)
+    캐시가 꺼져 있으면 키도 None
+    """
+    if tts_audio_cache is None:
+        return None, None, None
+    key = get_audio_cache_key(contents)
+    data = tts_audio_cache.get_bytes(key)
+    if data is not None:
+        return key, data, None
+    return key, None, tts_audio_cache.get_path(key)
+
+
+def stream_text_to_speech(contents: str, cancel_event=None, cache_key: Optional[str] = None):
+    """
+    문장 단위 스트리밍 합성
+    WAV 헤더를 먼저 보내고, 문장마다 추론이 끝나는 즉시 PCM(+문장 사이 무음)을 내보냅니다.
+    첫 오디오까지의 지연은 문단 전체가 아니라 첫 문장 하나의 합성 시간입니다.
+    cache_key 가 있으면 끝까지 합성된 경우에만 완전한 WAV 로 캐시에 저장합니다.
+    """
+    sample_rate = model.hps.data.sampling_rate
+    yield wav_header(sample_rate)
+    pcm_chunks = []
+    for chunk in model.tts_iter(
+        preprocess_text(contents),
+        speaker_ids[KR["speaker"]],
+        sdp_ratio=SDP_RATIO,
+        noise_scale=NOISE_SCALE,
+        noise_scale_w=NOISE_SCALE_W,
+        speed=SPEED,
+        cancel_event=cancel_event,
+        seed=SEED,
+    ):
+        pcm = to_pcm16(chunk)
+        pcm_chunks.append(pcm)
+        yield pcm
+
+    if cache_key is not None and tts_audio_cache is not None and not (cancel_event and cancel_event.is_set()):
+        pcm = b"".join(pcm_chunks)
+        tts_audio_cache.put(cache_key, pcm16_to_wav(pcm, sample_rate))
+
 
-def convert_text_to_speech(contents: str):
-    try:
-        audio = model.tts_to_file(preprocess_text(contents), speaker_ids[KR["speaker"]], output_path=None)
-        
-        # 메모리 내에 오디오 데이터를 저장하기 위한 버퍼 생성
-        buffer = io.BytesIO()
-        
-        # 오디오 데이터를 버퍼에 저장 (WAV 형식으로)
-        sf.write(buffer, audio, model.hps.data.sampling_rate, format='WAV')
-        
-        # 버퍼의 포인터를 시작 부분으로 재설정
-        buffer.seek(0)
-        
-        # StreamingResponse로 반환
-        return buffer
-    except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+def stream_text_to_speech_async(contents: str, cache_key: Optional[str] = None):
+    """
+    워커 풀에서 합성하는 비동기 스트림
+    대기열이 가득 차면 TTSQueueFullError, 클라이언트가 끊기면 다음 문장 전에 합성 중단
+    """
+    return tts_executor.stream(lambda cancel_event: stream_text_to_speech(contents, cancel_event, cache_key))
@@ -0,0 +1,218 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from ..utils.preprcessing import preprocess_text
+
+# 시간에 따라 답이 달라지는 질문/응답은 캐시하지 않음
+TIME_DEPENDENT_KEYWORDS = (
+    "시간", "몇 시", "몇시", "날짜", "오늘", "지금", "현재", "내일", "어제",
+    "요일", "날씨", "이번 주", "이번주", "최근", "방금",
+)
+TIME_DEPENDENT_PATTERN = re.compile(
+    r"\d{4}\s*년|\d{1,2}\s*월\s*\d{1,2}\s*일|\d{1,2}\s*시\s*\d{1,2}\s*분|(오전|오후)\s*\d{1,2}\s*시"
+)
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+class _Entry:
+    __slots__ = ("scope", "response", "expires_at", "size", "grams", "digits")
+
+    def __init__(self, scope, response, expires_at, size, grams, digits):
+        self.scope = scope
+        self.response = response
+        self.expires_at = expires_at
+        self.size = size
+        self.grams = grams
+        self.digits = digits
+
+
+class ResponseCache:
+    """
+    챗봇 응답 2단계 캐시
+    - 1단계: preprocess_text 로 정규화한 프롬프트의 완전 일치
+    - 2단계: 문자 n-gram 역색인으로 찾은 유사 프롬프트 (Jaccard 유사도)
+    두 단계는 같은 엔트리를 공유하므로 TTL, LRU 제거, 메모리 상한이 함께 적용됩니다.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        max_entries: int = 1024,
+        max_bytes: int = 4 * 1024 * 1024,
+        similarity_threshold: float = 0.85,
+        ngram_size: int = 2,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.similarity_threshold = similarity_threshold
+        self.ngram_size = ngram_size
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return preprocess_text(prompt).lower()
+
+    @staticmethod
+    def is_time_dependent(text: str) -> bool:
+        return any(keyword in text for keyword in TIME_DEPENDENT_KEYWORDS) or bool(
+            TIME_DEPENDENT_PATTERN.search(text)
+        )
+
+    def _grams(self, normalized: str) -> Set[str]:
+        compact = normalized.replace(" ", "")
+        n = self.ngram_size
+        if len(compact) <= n:
+            return {compact} if compact else set()
+        return {compact[i:i + n] for i in range(len(compact) - n + 1)}
+
+    @staticmethod
+    def _key(scope: str, normalized: str) -> str:
+        return f"{scope}\x00{normalized}"
+
+    def get(self, prompt: str, scope: str = "") -> Optional[str]:
+        """캐시된 응답을 반환합니다. 없으면 None"""
+        normalized = self.normalize(prompt)
+        if not normalized or self.is_time_dependent(prompt):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.monotonic()
+        key = self._key(scope, normalized)
+        with self._lock:
+            # 1단계: 완전 일치
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry.response
+                self._remove(key)
+                self.expirations += 1
+
+            # 2단계: n-gram 유사 일치 (숫자가 다르면 다른 요청으로 취급)
+            if self.similarity_threshold < 1.0:
+                match = self._find_similar(scope, normalized, now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.similar_hits += 1
+                    return self._entries[match].response
+
+            self.misses += 1
+            return None
+
+    def _find_similar(self, scope: str, normalized: str, now: float) -> Optional[str]:
+        grams = self._grams(normalized)
+        if not grams:
+            return None
+        digits = DIGITS_PATTERN.findall(normalized)
+
+        overlaps: Dict[str, int] = {}
+        for gram in grams:
+            for key in self._index.get(gram, ()):
+                overlaps[key] = overlaps.get(key, 0) + 1
+
+        best_key, best_score = None, self.similarity_threshold
+        for key, overlap in overlaps.items():
+            entry = self._entries[key]
+            if entry.scope != scope or entry.digits != digits or entry.expires_at <= now:
+                continue
+            score = overlap / (len(grams) + len(entry.grams) - overlap)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def put(self, prompt: str, response: str, scope: str = "") -> bool:
+        """응답을 저장합니다. 시간 의존 응답 등 캐시 대상이 아니면 False"""
+        normalized = self.normalize(prompt)
+        if (
+            not normalized
+            or not response
+            or self.is_time_dependent(prompt)
+            or self.is_time_dependent(response)
+        ):
+            with self._lock:
+                self.skipped += 1
+            return False
+
+        key = self._key(scope, normalized)
+        grams = self._grams(normalized)
+        # 키/응답 문자열과 n-gram 색인 항목의 대략적인 크기
+        size = len(key.encode("utf-8")) + len(response.encode("utf-8")) + 64 * len(grams)
+        if size > self.max_bytes:
+            with self._lock:
+                self.skipped += 1
+            return False
+
+        entry = _Entry(
+            scope,
+            response,
+            time.monotonic() + self.ttl_seconds,
+            size,
+            grams,
+            DIGITS_PATTERN.findall(normalized),
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            for gram in grams:
+                self._index.setdefault(gram, set()).add(key)
+            self.stores += 1
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for gram in entry.grams:
+            keys = self._index.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[gram]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "skipped": self.skipped,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
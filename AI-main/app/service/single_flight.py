@@ -0,0 +1,45 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 비동기 호출을 하나로 합칩니다.
+    먼저 온 요청이 업스트림 호출을 태스크로 띄우고, 나머지는 같은 태스크의 결과를 기다립니다.
+    호출 중인 클라이언트 하나가 끊겨도(취소되어도) 공유 태스크는 계속 진행됩니다.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _t, k=key: self._forget(k, _t))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 모든 대기자가 취소된 경우에도 예외가 '회수되지 않음' 경고로 남지 않도록 확인
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
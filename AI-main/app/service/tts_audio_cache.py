@@ -0,0 +1,178 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from ..utils.preprcessing import preprocess_text
+
+
+def file_checksum(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """모델 체크포인트 등 파일 내용의 sha256 (앞 16자리)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def audio_cache_key(
+    text: str,
+    speaker_id: int,
+    sdp_ratio: float,
+    noise_scale: float,
+    noise_scale_w: float,
+    speed: float,
+    model_checksum: str,
+    seed: Optional[int] = None,
+    precision: str = "fp32",
+    backend: str = "eager",
+) -> str:
+    """
+    합성 결과를 결정하는 모든 입력으로 만든 내용 기반 키
+    (추론 정밀도와 실행 방식(eager/script, weight norm 접기)도 파형을 바꾸므로 포함)
+    """
+    normalized = " ".join(preprocess_text(text).split())
+    parts = [
+        normalized,
+        str(speaker_id),
+        f"{sdp_ratio:.4f}",
+        f"{noise_scale:.4f}",
+        f"{noise_scale_w:.4f}",
+        f"{speed:.4f}",
+        model_checksum,
+        precision,
+        backend,
+    ]
+    # 시드가 없으면 키에 넣지 않음
+    if seed is not None:
+        parts.append(f"seed={seed}")
+    raw = "\x00".join(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSAudioCache:
+    """
+    합성된 WAV 의 2단계 캐시
+    - 메모리: 바이트 상한이 있는 LRU
+    - 디스크: directory/<key 앞 2자리>/<key>.wav, 전체 크기 상한을 넘으면 오래 안 쓴 파일부터 삭제
+    디스크 적중은 파일 경로를 돌려주므로 FileResponse 로 복사 없이 전송할 수 있습니다.
+    """
+
+    def __init__(self, directory: str, memory_max_bytes: int = 32 * 1024 * 1024, disk_max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # 디스크 파일의 LRU 순서와 크기 (시작 시 mtime 순으로 복원)
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.wav")
+
+    def _scan(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".wav"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """메모리 계층 조회"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return data
+
+    def get_path(self, key: str) -> Optional[str]:
+        """디스크 계층 조회. 적중 시 파일 경로"""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._disk:
+                self.misses += 1
+                return None
+            if not os.path.exists(path):
+                self._disk_bytes -= self._disk.pop(key)
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+            self.disk_hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, data: bytes) -> None:
+        size = len(data)
+        with self._lock:
+            if size <= self.memory_max_bytes:
+                if key in self._memory:
+                    self._memory_bytes -= len(self._memory.pop(key))
+                self._memory[key] = data
+                self._memory_bytes += size
+                while self._memory_bytes > self.memory_max_bytes:
+                    _, old = self._memory.popitem(last=False)
+                    self._memory_bytes -= len(old)
+            self.stores += 1
+
+        if size > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 다른 요청이 읽는 도중 덮어쓰지 않도록 임시 파일에 쓰고 교체
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if key in self._disk:
+                self._disk_bytes -= self._disk.pop(key)
+            self._disk[key] = size
+            self._disk_bytes += size
+            evicted = []
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+                old_key, old_size = self._disk.popitem(last=False)
+                self._disk_bytes -= old_size
+                evicted.append(old_key)
+                self.evictions += 1
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
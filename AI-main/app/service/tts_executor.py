@@ -0,0 +1,188 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator
+
+_DONE = object()
+
+
+class TTSQueueFullError(Exception):
+    """대기열이 가득 차서 합성 작업을 받을 수 없을 때 발생 (HTTP 429 로 변환)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"TTS queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _ReservedStream:
+    """
+    TTSExecutor.stream 가 돌려주는 비동기 이터레이터.
+    확보한 자리는 첫 순회 때 워커 작업에 넘기고, 그 전에 닫히거나 버려지면
+    (응답 시작 전 연결 끊김, 응답 생성 중 예외) 바로 반납합니다.
+    """
+
+    def __init__(self, executor: "TTSExecutor", make_iter: Callable[[threading.Event], Iterator[bytes]]):
+        self._executor = executor
+        self._make_iter = make_iter
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._reserved = True
+        self._inner = None
+
+    def _take(self) -> bool:
+        with self._lock:
+            reserved, self._reserved = self._reserved, False
+        return reserved
+
+    def _give_back(self) -> None:
+        if self._take():
+            self._executor._release(self._started, True)
+
+    def __aiter__(self) -> "_ReservedStream":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._inner is None:
+            if not self._take():
+                raise StopAsyncIteration
+            self._inner = self._executor._stream(self._make_iter, self._started)
+        return await self._inner.__anext__()
+
+    async def aclose(self) -> None:
+        if self._inner is None:
+            self._give_back()
+        else:
+            await self._inner.aclose()
+
+    def __del__(self) -> None:
+        self._give_back()
+
+
+class TTSExecutor:
+    """
+    CPU 를 쓰는 TTS 합성을 이벤트 루프 밖의 전용 스레드 풀에서 실행합니다.
+    - 동시에 실행 중 + 대기 중인 작업 수를 workers + max_queue 로 제한 (초과 시 TTSQueueFullError)
+    - 작업마다 취소 이벤트를 두어 클라이언트가 끊기면 문장 사이에서 합성을 멈춤
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 8, torch_threads: int = 0):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tts-worker")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._avg_seconds = 0.0
+
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+        if torch_threads > 0:
+            import torch
+
+            # 워커끼리 코어를 나눠 쓰도록 intra-op 스레드 수를 제한
+            torch.set_num_threads(torch_threads)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._active >= self.capacity:
+                self.rejected += 1
+                raise TTSQueueFullError(self.retry_after())
+            self._active += 1
+
+    def _release(self, started: float, cancelled: bool) -> None:
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._active -= 1
+            if cancelled:
+                self.cancelled += 1
+            else:
+                self.completed += 1
+                # 지수 이동 평균으로 작업 시간을 추정해 Retry-After 계산에 사용
+                self._avg_seconds = elapsed if self.completed == 1 else 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def retry_after(self) -> int:
+        """대기열이 한 자리 빌 때까지의 대략적인 시간(초)"""
+        if self._avg_seconds <= 0:
+            return 1
+        waiting = max(1, self._active - self.workers + 1)
+        return max(1, math.ceil(self._avg_seconds * waiting / self.workers))
+
+    def stream(self, make_iter: Callable[[threading.Event], Iterator[bytes]]) -> AsyncIterator[bytes]:
+        """
+        make_iter(cancel_event) 가 돌려주는 동기 이터레이터를 워커 스레드에서 순회하며
+        나오는 조각을 비동기로 전달합니다.
+        자리는 여기서 바로 확보하므로, 대기열이 가득 차면 응답을 시작하기 전에 TTSQueueFullError.
+        반환된 이터레이터가 닫히면(클라이언트 연결 끊김) 취소 이벤트가 설정되고,
+        한 번도 순회하지 않고 닫히거나 버려지면 자리만 반납됩니다.
+        """
+        self._acquire()
+        return _ReservedStream(self, make_iter)
+
+    async def _stream(
+        self, make_iter: Callable[[threading.Event], Iterator[bytes]], started: float
+    ) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancel = threading.Event()
+
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘
+                cancel.set()
+
+        def run() -> None:
+            try:
+                if cancel.is_set():
+                    return
+                iterator = make_iter(cancel)
+                try:
+                    for chunk in iterator:
+                        if cancel.is_set():
+                            break
+                        put(chunk)
+                finally:
+                    close = getattr(iterator, "close", None)
+                    if close is not None:
+                        close()
+            except BaseException as e:
+                put(e)
+            finally:
+                self._release(started, cancel.is_set())
+                put(_DONE)
+
+        try:
+            self._pool.submit(run)
+        except BaseException:
+            self._release(started, True)
+            raise
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            cancel.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "active": self._active,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "avg_seconds": round(self._avg_seconds, 3),
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
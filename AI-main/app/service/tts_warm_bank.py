@@ -0,0 +1,130 @@
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from ..utils.audio import pcm16_to_wav
+from ..utils.preprcessing import preprocess_text
+
+logger = logging.getLogger(__name__)
+
+# chat_bot_service.OFFLINE_TIME_FORMAT 를 preprocess_text 한 형태
+TIME_PATTERN = re.compile(r"^현재 시간은 (\d+)년 (\d+)월 (\d+)일 (\d+)시 (\d+)분입니다$")
+TIME_PREFIX = "현재 시간은"
+# (단위, 값 범위) - 연도는 warm() 시점 기준으로 정함
+# 월/일/시/분은 OFFLINE_TIME_FORMAT(%m/%d/%H/%M)처럼 두 자리("09시")로 합성해 전체 합성과 같게 읽힘
+TIME_UNITS = (
+    ("월", range(1, 13)),
+    ("일", range(1, 32)),
+    ("시", range(0, 24)),
+    ("분입니다", range(0, 60)),
+)
+
+
+def _key(text: str) -> str:
+    return preprocess_text(text)
+
+
+def _clip_text(unit: str, value: int) -> str:
+    return TIME_PREFIX if unit == "prefix" else f"{value:02d}{unit}"
+
+
+def _trim_trailing_silence(pcm: bytes) -> bytes:
+    """합성 결과 끝에 붙는 무음(0 샘플)을 잘라냄 - 조각 사이에 끊김이 생기지 않도록"""
+    end = len(pcm.rstrip(b"\x00"))
+    return pcm[:end + end % 2]
+
+
+class WarmAudioBank:
+    """
+    시작 시 한 번 합성해 메모리에 고정해 두는 음성 모음
+    - 고정 문구: 문장 전체 WAV
+    - 시간 응답: "현재 시간은" + N년/N월/N일/N시/N분입니다 조각을 이어 붙여 WAV 구성
+      (마지막 조각을 뺀 나머지는 끝 무음을 잘라 저장)
+    적중 시 합성 없이 메모리 복사만으로 응답합니다.
+    """
+
+    def __init__(self, synthesize_pcm: Callable[[str], bytes], sample_rate: int):
+        # synthesize_pcm: 텍스트 → PCM16 바이트 (문장 뒤 무음 포함)
+        self.synthesize_pcm = synthesize_pcm
+        self.sample_rate = sample_rate
+
+        self._phrases: Dict[str, bytes] = {}
+        self._clips: Dict[Tuple[str, int], bytes] = {}
+        self._lock = threading.Lock()
+
+        self.ready = False
+        self.hits = 0
+        self.time_hits = 0
+
+    def warm(self, phrases: Iterable[str], stop_event: Optional[threading.Event] = None) -> None:
+        """
+        고정 문구와 시간 조각을 모두 합성합니다. 실패한 항목은 건너뜀
+        stop_event 가 설정되면(서버 종료) 다음 항목 전에 멈춥니다.
+        """
+        started = time.perf_counter()
+        for phrase in phrases:
+            if stop_event is not None and stop_event.is_set():
+                logger.info("🛑 TTS 사전 합성 중단 (종료 요청)")
+                return
+            pcm = self._render(phrase)
+            if pcm is not None:
+                with self._lock:
+                    self._phrases[_key(phrase)] = pcm16_to_wav(pcm, self.sample_rate)
+
+        year = datetime.now().year
+        units = (("prefix", (0,)), ("년", (year, year + 1))) + TIME_UNITS
+        for unit, values in units:
+            for value in values:
+                if stop_event is not None and stop_event.is_set():
+                    logger.info("🛑 TTS 사전 합성 중단 (종료 요청)")
+                    return
+                pcm = self._render(_clip_text(unit, value))
+                if pcm is not None:
+                    if unit != TIME_UNITS[-1][0]:
+                        pcm = _trim_trailing_silence(pcm)
+                    with self._lock:
+                        self._clips[(unit, value)] = pcm
+
+        self.ready = True
+        logger.info(
+            f"🔥 TTS 사전 합성 완료 - 문구 {len(self._phrases)}개, 시간 조각 {len(self._clips)}개 "
+            f"({time.perf_counter() - started:.1f}초)"
+        )
+
+    def _render(self, text: str) -> Optional[bytes]:
+        try:
+            return self.synthesize_pcm(text)
+        except Exception as e:
+            logger.warning(f"⚠️ TTS 사전 합성 실패 \"{text}\": {str(e)}")
+            return None
+
+    def get(self, text: str) -> Optional[bytes]:
+        """고정 문구 또는 시간 응답이면 WAV 바이트, 아니면 None"""
+        key = _key(text)
+        wav = self._phrases.get(key)
+        if wav is not None:
+            self.hits += 1
+            return wav
+
+        match = TIME_PATTERN.match(key)
+        if match is None:
+            return None
+        year, month, day, hour, minute = (int(v) for v in match.groups())
+        parts = [("prefix", 0), ("년", year), ("월", month), ("일", day), ("시", hour), ("분입니다", minute)]
+        clips = [self._clips.get(part) for part in parts]
+        if any(clip is None for clip in clips):
+            return None
+        self.time_hits += 1
+        return pcm16_to_wav(b"".join(clips), self.sample_rate)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phrases": len(self._phrases),
+            "time_clips": len(self._clips),
+            "hits": self.hits,
+            "time_hits": self.time_hits,
+        }
@@ -0,0 +1,29 @@
+import struct
+from typing import Optional
+
+import numpy as np
+
+
+def wav_header(sample_rate: int, data_size: Optional[int] = None, channels: int = 1, bits_per_sample: int = 16) -> bytes:
+    """
+    PCM WAV 헤더
+    길이를 모르는 스트리밍(data_size=None)에서는 RIFF/data 크기를 0xFFFFFFFF 로 두며,
+    대부분의 플레이어가 끝까지 이어서 재생합니다.
+    """
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    riff_size = 0xFFFFFFFF if data_size is None else 36 + data_size
+    data_size = 0xFFFFFFFF if data_size is None else data_size
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, block_align, bits_per_sample)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def to_pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def pcm16_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    return wav_header(sample_rate, len(pcm)) + pcm
@@ -8,4 +8,5 @@ EN = {"language": "EN", "speaker": "EN-US"}
 KR = {"language": "KR", "speaker": "KR", "path":"app/resources/MeloTTS_kr"}
 
 OUTPUT_PATH = os.path.join("app", "static", "temp")
+CONVERSATION_DB_PATH = os.path.join("app", "resources", "conversation.db")
 KR_MODEL_PATH = os.path.join(os.getcwd(), "app", "resources", "bert-kor-base")
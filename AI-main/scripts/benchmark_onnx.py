@@ -0,0 +1,67 @@
+"""
+ONNX Runtime vs PyTorch synthesizer latency on one sentence (front end excluded).
+
+    python scripts/benchmark_onnx.py --config app/resources/.../config.json --ckpt .../checkpoint.pth
+
+Run from AI-main (the Korean BERT is loaded from app/resources).
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.melo_my.ort_api import ORTTTS  # noqa: E402
+from app.melo_my.precision import mel_distance  # noqa: E402
+
+logger = logging.getLogger("benchmark_onnx")
+
+# deterministic settings so both runtimes produce the same waveform
+DETERMINISTIC = dict(noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0, return_attn=False)
+
+
+def time_infer(infer, args, repeats):
+    """Mean seconds per infer call after one warm-up, and the last waveform."""
+    with torch.no_grad():
+        infer(*args, **DETERMINISTIC)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            audio = infer(*args, **DETERMINISTIC)[0][0, 0]
+    return (time.perf_counter() - started) / repeats, audio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--ckpt", required=True)
+    parser.add_argument("--language", default="KR")
+    parser.add_argument("--text", default="안녕하세요. 오늘 날씨가 참 좋네요.")
+    parser.add_argument("--speaker", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = default)")
+    parser.add_argument("--onnx-dir", default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", force=True)
+
+    tts = ORTTTS(args.language, use_hf=False, config_path=args.config, ckpt_path=args.ckpt,
+                 onnx_dir=args.onnx_dir, intra_op_threads=args.threads)
+    infer_args = tts._infer_args(tts._text_features(args.text), args.speaker)
+
+    torch_seconds, reference = time_infer(tts.model.infer, infer_args, args.repeats)
+    onnx_seconds, output = time_infer(tts.runner.infer, infer_args, args.repeats)
+    audio_seconds = reference.shape[-1] / tts.hps.data.sampling_rate
+
+    logger.info("audio       %.2fs", audio_seconds)
+    logger.info("pytorch     %.4fs/call (RTF %.3f)", torch_seconds, torch_seconds / audio_seconds)
+    logger.info("onnxruntime %.4fs/call (RTF %.3f)", onnx_seconds, onnx_seconds / audio_seconds)
+    logger.info("speedup     %.2fx", torch_seconds / onnx_seconds if onnx_seconds > 0 else float("inf"))
+    logger.info("mel distance %.2e, length diff %d samples",
+                mel_distance(reference, output, tts.hps.data.sampling_rate), output.shape[-1] - reference.shape[-1])
+
+
+if __name__ == "__main__":
+    main()
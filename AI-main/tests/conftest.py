@@ -0,0 +1,136 @@
+import json
+import os
+import sys
+
+import pytest
+import torch
+
+# app 패키지를 AI-main 기준으로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# small SynthesizerTrn with the Melo KR structure (speaker-conditioned encoder, transformer flow)
+TINY_CONFIG = dict(
+    inter_channels=64,
+    hidden_channels=64,
+    filter_channels=128,
+    n_heads=2,
+    n_layers=3,
+    n_layers_trans_flow=3,
+    kernel_size=3,
+    p_dropout=0.1,
+    resblock="1",
+    resblock_kernel_sizes=[3, 7, 11],
+    resblock_dilation_sizes=[[1, 3, 5]] * 3,
+    upsample_rates=[8, 8, 2, 2, 2],
+    upsample_initial_channel=64,
+    upsample_kernel_sizes=[16, 16, 8, 2, 2],
+    gin_channels=32,
+    use_spk_conditioned_encoder=True,
+)
+TINY_SAMPLING_RATE = 44100
+
+
+def build_tiny_model(seed=0, n_vocab=100, n_speakers=4, num_tones=16, num_languages=10):
+    from app.melo_my.models import SynthesizerTrn
+
+    torch.manual_seed(seed)
+    model = SynthesizerTrn(
+        n_vocab, 1025, 32, n_speakers=n_speakers, num_tones=num_tones, num_languages=num_languages, **TINY_CONFIG
+    )
+    # zero-initialized projections would make the flows identities
+    with torch.no_grad():
+        for parameter in model.parameters():
+            if parameter.dim() > 0 and not parameter.any():
+                parameter.normal_(0, 0.02)
+    return model.eval()
+
+
+@pytest.fixture
+def tiny_model():
+    return build_tiny_model()
+
+
+@pytest.fixture
+def make_inputs():
+    """infer() positional args for a random KR-style sentence (bert=None, 768-dim ja_bert)."""
+
+    def make(length=20, batch=1, seed=1):
+        generator = torch.Generator().manual_seed(seed)
+        return (
+            torch.randint(1, 100, (batch, length), generator=generator),
+            torch.LongTensor([length] * batch),
+            torch.LongTensor([0] * batch),
+            torch.randint(0, 16, (batch, length), generator=generator),
+            torch.full((batch, length), 3),
+            None,
+            torch.randn(batch, 768, length, generator=generator),
+        )
+
+    return make
+
+
+def write_tiny_bert(directory):
+    """
+    Randomly initialized stand-in for bert-kor-base: same hidden size (768) and
+    a Hangul-syllable vocabulary, so the real G2P and BERT code paths run.
+    """
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + [chr(c) for c in range(0xAC00, 0xD7A4)]
+    vocab += list("0123456789.,!?~")
+    vocab_file = os.path.join(directory, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+    BertTokenizerFast(vocab_file, do_lower_case=False, tokenize_chinese_chars=False).save_pretrained(directory)
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=768, num_hidden_layers=3, num_attention_heads=12, intermediate_size=64
+    )
+    BertModel(config).save_pretrained(directory)
+    return str(directory)
+
+
+@pytest.fixture(scope="session")
+def tts_class(tmp_path_factory):
+    """
+    app.melo_my.api, whose Korean front end loads BERT at import: pointed at a
+    tiny random BERT so the tests run without app/resources/bert-kor-base.
+    """
+    try:
+        import transformers  # noqa: F401
+    except ImportError as e:
+        pytest.skip(f"Melo TTS front end not available: {e}")
+    from app.utils import const
+
+    if "app.melo_my.text.korean_bert" not in sys.modules:
+        const.KR_MODEL_PATH = write_tiny_bert(tmp_path_factory.mktemp("bert"))
+    from app.melo_my.api import TTS
+    return TTS
+
+
+@pytest.fixture
+def make_tts(tts_class, tmp_path):
+    """Builds TTS("KR", ...) on a tiny KR config and checkpoint written to tmp_path."""
+    from app.melo_my.text.symbols import num_languages, num_tones, symbols
+
+    config_path = tmp_path / "config.json"
+    ckpt_path = tmp_path / "checkpoint.pth"
+    config = {
+        "data": {
+            "sampling_rate": TINY_SAMPLING_RATE, "filter_length": 2048, "hop_length": 512, "add_blank": True,
+            "n_speakers": 1, "spk2id": {"KR": 0}, "disable_bert": False,
+        },
+        "train": {"segment_size": 16384},
+        "symbols": symbols,
+        "num_tones": num_tones,
+        "num_languages": num_languages,
+        "model": TINY_CONFIG,
+    }
+    config_path.write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+    model = build_tiny_model(n_vocab=len(symbols), n_speakers=1, num_tones=num_tones, num_languages=num_languages)
+    torch.save({"model": model.state_dict()}, ckpt_path)
+
+    def make(**kwargs):
+        return tts_class("KR", device="cpu", use_hf=False, config_path=str(config_path), ckpt_path=str(ckpt_path), **kwargs)
+
+    return make
@@ -0,0 +1,26 @@
+import pytest
+import torch
+
+from app.melo_my import commons
+from app.melo_my.attentions import MultiHeadAttention
+
+
+@pytest.mark.parametrize("length", [1, 3, 5, 9, 40])
+@pytest.mark.parametrize("heads_share", [True, False])
+@pytest.mark.parametrize("proximal_bias", [False, True])
+def test_windowed_attention_matches_the_generic_path(length, heads_share, proximal_bias):
+    torch.manual_seed(length)
+    attention = MultiHeadAttention(16, 16, 2, window_size=4, heads_share=heads_share, proximal_bias=proximal_bias)
+    x = torch.randn(2, 16, length)
+    # second item padded, so masked rows and columns are exercised
+    x_mask = commons.sequence_mask(torch.tensor([length, max(1, length // 2)]), length).unsqueeze(1).float()
+    mask = x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
+
+    with torch.no_grad():
+        # p_dropout is 0, so train mode only switches to the pad/reshape path
+        generic = attention.train()(x, x, mask)
+        generic_attn = attention.attn
+        windowed = attention.eval()(x, x, mask)
+        windowed_attn = attention.attn
+    assert (windowed - generic).abs().max().item() < 1e-5
+    assert (windowed_attn - generic_attn).abs().max().item() < 1e-6
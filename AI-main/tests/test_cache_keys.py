@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+from app.melo_my.feature_cache import TextFeatureCache
+from app.service.tts_audio_cache import audio_cache_key
+
+
+def _audio_key(**kwargs):
+    return audio_cache_key("안녕하세요.", 0, 0.2, 0.6, 0.8, 1.0, "checksum", **kwargs)
+
+
+def test_audio_key_depends_on_precision_and_backend():
+    """정밀도나 실행 방식이 다르면 다른 캐시 항목"""
+    base = _audio_key()
+    assert _audio_key(precision="int8") != base
+    assert _audio_key(backend="script-folded") != base
+    assert _audio_key(precision="fp32", backend="eager") == base
+
+
+def test_feature_key_depends_on_bert_precision():
+    hps = SimpleNamespace(data=SimpleNamespace(add_blank=True, disable_bert=False))
+    keys = {TextFeatureCache.key("안녕하세요.", "KR", hps, precision=mode) for mode in ("fp32", "int8", "bf16")}
+    assert len(keys) == 3
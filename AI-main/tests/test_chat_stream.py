@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from app.service import chat_bot_service
+
+
+class _BrokenStream:
+    """첫 delta 를 보낸 뒤 httpx 가 아닌 예외를 내는 업스트림 응답"""
+
+    is_success = True
+    status_code = 200
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def aiter_lines(self):
+        for delta in self.deltas:
+            yield "data: " + json.dumps({"choices": [{"delta": {"content": delta}}]})
+        raise RuntimeError("upstream parser crashed")
+
+
+class _Client:
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    def stream(self, method, url, json=None):
+        return _BrokenStream(self.deltas)
+
+
+def _collect(monkeypatch, deltas):
+    monkeypatch.setattr(chat_bot_service, "is_offline", lambda: False)
+    monkeypatch.setattr(chat_bot_service, "get_cached_response", lambda contents: None)
+    monkeypatch.setattr(chat_bot_service, "get_http_client", lambda: _Client(deltas))
+
+    async def run():
+        return [delta async for delta in chat_bot_service.stream_chatbot_response("질문")]
+
+    return asyncio.run(run())
+
+
+def test_unexpected_error_mid_stream_ends_with_error_message(monkeypatch):
+    assert _collect(monkeypatch, ["안녕"]) == ["안녕", chat_bot_service.OFFLINE_ERROR_RESPONSE]
+
+
+def test_unexpected_error_before_first_delta_falls_back_to_offline(monkeypatch):
+    monkeypatch.setattr(chat_bot_service, "get_offline_response", lambda contents: "오프라인")
+    assert _collect(monkeypatch, []) == ["오프라인"]
@@ -0,0 +1,29 @@
+import pytest
+import torch
+
+DETERMINISTIC = dict(noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0)
+
+
+@pytest.mark.parametrize("chunk_frames,overlap_frames", [(16, 4), (32, 4), (48, 8), (4096, 4)])
+def test_infer_stream_matches_infer(tiny_model, make_inputs, chunk_frames, overlap_frames):
+    args = make_inputs(60)
+    with torch.no_grad():
+        reference = tiny_model.infer(*args, **DETERMINISTIC)[0]
+        chunks = list(tiny_model.infer_stream(
+            *args, chunk_frames=chunk_frames, overlap_frames=overlap_frames, **DETERMINISTIC
+        ))
+    output = torch.cat(chunks, dim=2)
+
+    frames = reference.shape[-1] // 512
+    assert (len(chunks) > 1) == (frames > chunk_frames)
+    assert output.shape == reference.shape
+    assert (output - reference).abs().max().item() < 1e-6
+
+
+def test_infer_stream_matches_infer_on_a_padded_batch(tiny_model, make_inputs):
+    args = list(make_inputs(40, batch=2))
+    args[1] = torch.LongTensor([40, 23])
+    with torch.no_grad():
+        reference = tiny_model.infer(*args, **DETERMINISTIC)[0]
+        output = torch.cat(list(tiny_model.infer_stream(*args, chunk_frames=16, **DETERMINISTIC)), dim=2)
+    assert (output - reference).abs().max().item() < 1e-6
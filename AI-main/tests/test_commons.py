@@ -0,0 +1,55 @@
+import pytest
+import torch
+
+from app.melo_my import commons
+from app.melo_my.attentions import MultiHeadAttention
+
+
+@pytest.fixture(autouse=True)
+def empty_position_cache():
+    commons._position_cache.clear()
+    yield
+    commons._position_cache.clear()
+
+
+@pytest.mark.parametrize("length", [1, 63, 64, 65, 200])
+def test_cached_arange_matches_torch(length):
+    for dtype in (torch.long, torch.int32):
+        assert torch.equal(commons.arange(length, dtype=dtype), torch.arange(length, dtype=dtype))
+
+
+@pytest.mark.parametrize("length", [5, 64, 130])
+def test_cached_proximal_bias_matches_the_uncached_one(length):
+    attention = MultiHeadAttention(8, 8, 2, proximal_bias=True)
+    r = torch.arange(length, dtype=torch.float32)
+    expected = -torch.log1p(torch.abs(r.unsqueeze(0) - r.unsqueeze(1)))
+    # a longer length first, so the shorter one is sliced from its bucket
+    attention._attention_bias_proximal(length + 100)
+    assert torch.equal(attention._attention_bias_proximal(length)[0, 0], expected)
+
+
+def test_position_cache_is_bounded():
+    for i in range(commons.POSITION_CACHE_ENTRIES + 8):
+        commons.cached_position_tensor(f"t{i}", 10, "cpu", torch.float32, torch.arange)
+    assert len(commons._position_cache) == commons.POSITION_CACHE_ENTRIES
+    assert ("t0", 64, torch.device("cpu"), torch.float32) not in commons._position_cache
+
+
+def test_attention_mask_matches_the_dense_mask():
+    lengths = torch.tensor([7, 4])
+    x_mask = commons.sequence_mask(lengths, 7).unsqueeze(1).float()
+    expected = x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
+    assert torch.equal(commons.attention_mask(x_mask), expected)
+    # shared by the next layer of the same forward pass
+    assert commons.attention_mask(x_mask) is commons.attention_mask(x_mask)
+
+    # nothing masked: None, i.e. attend everywhere
+    assert commons.attention_mask(torch.ones(1, 1, 7)) is None
+
+
+def test_unmasked_attention_matches_an_all_ones_mask():
+    torch.manual_seed(0)
+    attention = MultiHeadAttention(8, 8, 2, window_size=4).eval()
+    x = torch.randn(1, 8, 12)
+    with torch.no_grad():
+        assert torch.allclose(attention(x, x, None), attention(x, x, torch.ones(1, 1, 12, 12)), atol=1e-6)
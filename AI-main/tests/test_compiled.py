@@ -0,0 +1,32 @@
+import os
+
+import pytest
+import torch
+
+from app.melo_my.export import CompiledInference, graph_fingerprint
+
+DETERMINISTIC = dict(noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0)
+BUCKETS = dict(x_buckets=(32,), y_bucket_frames=128, max_y_frames=256)
+
+
+def test_traced_graphs_match_eager_and_reload_from_disk(tiny_model, make_inputs, tmp_path):
+    args = make_inputs(20)
+    runner = CompiledInference(tiny_model, cache_dir=str(tmp_path), cache_key="tiny", **BUCKETS)
+    runner.warmup()
+    assert os.path.basename(runner.cache_dir) == f"tiny-{graph_fingerprint()}"
+    assert sorted(os.listdir(runner.cache_dir)) == sorted(
+        ["encoder_32.pt", "flow_128.pt", "decoder_128.pt", "flow_256.pt", "decoder_256.pt"]
+    )
+
+    with torch.no_grad():
+        reference = tiny_model.infer(*args, **DETERMINISTIC)[0]
+        output = runner.infer(*args, **DETERMINISTIC)[0]
+        reloaded = CompiledInference(tiny_model, cache_dir=str(tmp_path), cache_key="tiny", **BUCKETS)
+        again = reloaded.infer(*args, **DETERMINISTIC)[0]
+    assert (output - reference).abs().max().item() < 1e-4
+    assert torch.equal(again, output)
+
+
+def test_only_the_script_backend_is_supported(tiny_model):
+    with pytest.raises(ValueError):
+        CompiledInference(tiny_model, backend="compile")
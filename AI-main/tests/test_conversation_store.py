@@ -0,0 +1,24 @@
+from app.service.conversation_store import ConversationStore
+
+
+def test_unknown_rooms_are_not_created(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversation.db"))
+    try:
+        assert store.append_exchange(1, "안녕", "안녕하세요") is False
+        assert store.get_room(1) is None
+        assert store.build_context(1) == []
+    finally:
+        store.close()
+
+
+def test_history_stays_in_its_own_room(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversation.db"))
+    try:
+        first = store.create_room(user_id=1)["conversationRoomNo"]
+        second = store.create_room(user_id=2)["conversationRoomNo"]
+        assert store.append_exchange(first, "점심 만원 썼어", "가계부에 기록했어요") is True
+
+        assert [m["content"] for m in store.build_context(first)] == ["점심 만원 썼어", "가계부에 기록했어요"]
+        assert store.build_context(second) == []
+    finally:
+        store.close()
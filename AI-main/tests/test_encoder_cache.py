@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+import torch
+
+SAMPLING = dict(sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8)
+
+
+@pytest.fixture
+def features():
+    """One sentence's front-end output (bert=None, 768-dim ja_bert), as _text_features returns it."""
+    generator = torch.Generator().manual_seed(1)
+    phones = torch.randint(1, 100, (30,), generator=generator)
+    tones = torch.randint(0, 7, (30,), generator=generator)
+    return None, torch.randn(768, 30, generator=generator), phones, tones, torch.full((30,), 3)
+
+
+def synthesize(tts, features, speed=1.0, seed=None, **overrides):
+    kwargs = dict(SAMPLING, **overrides)
+    return tts._synthesize(
+        features, 0, kwargs["sdp_ratio"], kwargs["noise_scale"], kwargs["noise_scale_w"], speed, seed=seed
+    ).result()
+
+
+def test_seeded_hit_matches_uncached_synthesis(make_tts, features):
+    tts = make_tts()
+    uncached = synthesize(tts, features, seed=7)
+
+    tts.enable_encoder_cache(4)
+    first = synthesize(tts, features, seed=7)
+    hit = synthesize(tts, features, seed=7)
+    assert tts.encoder_cache.stats()["hits"] == 1
+    assert (first == uncached).all() and (hit == uncached).all()
+
+    # another speed re-renders the cached durations
+    slow = synthesize(tts, features, speed=0.8, seed=7)
+    assert tts.encoder_cache.stats()["hits"] == 2
+    assert len(slow) > len(hit)
+
+
+def test_unseeded_stochastic_durations_are_not_cached(make_tts, features):
+    tts = make_tts()
+    tts.enable_encoder_cache(4)
+    synthesize(tts, features)
+    synthesize(tts, features)
+    assert tts.encoder_cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 0}
+
+    # without SDP noise the durations are deterministic, so unseeded calls are cached
+    synthesize(tts, features, noise_scale_w=0.0)
+    synthesize(tts, features, noise_scale_w=0.0)
+    assert tts.encoder_cache.stats()["hits"] == 1
+
+
+def test_batching_warns_that_it_bypasses_the_cache(make_tts, caplog):
+    tts = make_tts()
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.melo_my.api"):
+            tts.enable_encoder_cache(4)
+            assert not caplog.records
+            tts.enable_batching(4)
+        assert "batching scheduler" in caplog.records[0].getMessage()
+    finally:
+        tts.disable_batching()
@@ -0,0 +1,31 @@
+import pytest
+import torch
+
+from app.melo_my.feature_cache import TextFeatureCache
+
+
+def _features(length=12):
+    generator = torch.Generator().manual_seed(0)
+    return (
+        None,
+        torch.randn(768, length, generator=generator),
+        torch.randint(1, 100, (length,), generator=generator),
+        torch.randint(0, 16, (length,), generator=generator),
+        torch.full((length,), 3),
+    )
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_miss_returns_what_a_hit_returns(tmp_path, on_disk):
+    cache = TextFeatureCache(max_entries=4, directory=str(tmp_path) if on_disk else None)
+    features = _features()
+    stored = cache.put("key", *features)
+    # fp16-rounded, so not the raw BERT output
+    assert not torch.equal(stored[1], features[1])
+
+    if on_disk:
+        cache = TextFeatureCache(max_entries=4, directory=str(tmp_path))
+    hit = cache.get("key")
+    assert stored[0] is None and hit[0] is None
+    for a, b in zip(stored[1:], hit[1:]):
+        assert torch.equal(a, b)
@@ -0,0 +1,68 @@
+import pytest
+import torch
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from app.melo_my.export import OnnxInference, export_onnx  # noqa: E402
+from conftest import build_tiny_model  # noqa: E402
+
+DETERMINISTIC = dict(noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0)
+
+
+@pytest.fixture(scope="module")
+def folded_model():
+    return build_tiny_model().optimize_for_inference()
+
+
+@pytest.fixture(scope="module")
+def onnx_runner(folded_model, tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("onnx"))
+    export_onnx(folded_model, directory)
+    return OnnxInference(directory, folded_model.upsample_rates, fallback=folded_model)
+
+
+@pytest.mark.parametrize("length", [3, 40, 150])
+@pytest.mark.parametrize("sdp_ratio", [0.0, 0.5])
+def test_onnx_matches_eager(folded_model, onnx_runner, make_inputs, length, sdp_ratio):
+    # noise_scale_w=0 keeps the stochastic duration predictor deterministic
+    kwargs = dict(DETERMINISTIC, sdp_ratio=sdp_ratio)
+    args = make_inputs(length)
+    with torch.no_grad():
+        reference = folded_model.infer(*args, **kwargs)
+    output = onnx_runner.infer(*args, **kwargs)
+
+    assert output[0].shape == reference[0].shape
+    assert (output[0] - reference[0]).abs().max().item() < 1e-4
+    assert torch.equal(output[2], reference[2])  # same durations / y_mask
+
+
+def test_onnx_matches_eager_on_a_padded_batch(folded_model, onnx_runner, make_inputs):
+    args = list(make_inputs(40, batch=2))
+    args[1] = torch.LongTensor([40, 25])
+    with torch.no_grad():
+        reference = folded_model.infer(*args, **DETERMINISTIC)[0]
+    output = onnx_runner.infer(*args, **DETERMINISTIC)[0]
+    assert (output - reference).abs().max().item() < 1e-4
+
+
+def test_seeded_stochastic_durations_use_the_fallback(folded_model, onnx_runner, make_inputs):
+    args = make_inputs(20)
+    kwargs = dict(noise_scale=0.6, noise_scale_w=0.8, sdp_ratio=0.2)
+    with torch.no_grad():
+        reference = folded_model.infer(*args, generator=torch.Generator().manual_seed(3), **kwargs)
+    output = onnx_runner.infer(*args, generator=torch.Generator().manual_seed(3), **kwargs)
+    assert torch.equal(output[2], reference[2])  # same sampled durations
+    assert (output[0] - reference[0]).abs().max().item() < 1e-4
+
+
+def test_seeded_fallback_is_logged_once(onnx_runner, make_inputs, caplog):
+    onnx_runner._warned_seeded_fallback = False
+    args = make_inputs(20)
+    with caplog.at_level("WARNING", logger="app.melo_my.export"):
+        onnx_runner.encode(*args, noise_scale_w=0.0, sdp_ratio=0.2, generator=torch.Generator().manual_seed(3))
+        assert not caplog.records  # no SDP noise: the graph is used
+        for _ in range(2):
+            onnx_runner.encode(*args, noise_scale_w=0.8, sdp_ratio=0.2, generator=torch.Generator().manual_seed(3))
+    assert len(caplog.records) == 1
+    assert "ONNX Runtime" in caplog.records[0].getMessage()
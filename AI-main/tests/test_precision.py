@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from app.melo_my.precision import apply_precision, compare_precision
+from conftest import TINY_SAMPLING_RATE
+
+DETERMINISTIC = dict(noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0)
+
+
+def test_fp32_against_itself_is_exact(tiny_model, make_inputs):
+    result = compare_precision(tiny_model, make_inputs(40), "fp32", TINY_SAMPLING_RATE, repeats=1, **DETERMINISTIC)
+    assert result["mode"] == "fp32"
+    assert result["mel_distance"] == 0.0
+    assert result["length_diff"] == 0
+    assert result["fp32_seconds"] > 0 and result["seconds"] > 0
+    assert math.isclose(result["speedup"], result["fp32_seconds"] / result["seconds"])
+
+
+def test_int8_stays_close_to_fp32(tiny_model, make_inputs):
+    result = compare_precision(tiny_model, make_inputs(40), "int8", TINY_SAMPLING_RATE, repeats=2, **DETERMINISTIC)
+    assert result["mode"] == "int8"
+    assert 0.0 < result["mel_distance"] < 0.5
+    assert abs(result["length_diff"]) <= 512  # at most one latent frame of rounding
+    assert 0 < result["speedup"] < float("inf")
+    # the reference model itself is left untouched
+    assert getattr(tiny_model, "precision", "fp32") == "fp32"
+
+
+def test_candidate_args_are_used_for_the_candidate(tiny_model, make_inputs):
+    result = compare_precision(
+        tiny_model, make_inputs(40, seed=1), "fp32", TINY_SAMPLING_RATE, repeats=1,
+        candidate_args=make_inputs(40, seed=2), **DETERMINISTIC,
+    )
+    assert result["mel_distance"] > 0.0
+
+
+def test_reference_must_be_fp32(tiny_model, make_inputs):
+    apply_precision(tiny_model, "int8")
+    with pytest.raises(ValueError):
+        compare_precision(tiny_model, make_inputs(20), "int8", TINY_SAMPLING_RATE, repeats=1, **DETERMINISTIC)
+
+
+@pytest.fixture
+def checked_tts(make_tts, make_inputs, monkeypatch):
+    """TTS whose precision check runs on fixed features (the G2P needs nltk data) and leaves BERT alone."""
+    from app.melo_my.text import korean_bert
+
+    monkeypatch.setattr(korean_bert, "model", korean_bert.model)
+    monkeypatch.setattr(korean_bert, "precision", korean_bert.precision)
+    tts = make_tts()
+    phones, _, _, tones, languages, _, ja_bert = make_inputs(30)
+    features = (None, ja_bert[0], phones[0], tones[0], languages[0])
+    monkeypatch.setattr(tts, "_uncached_text_features", lambda text, bert_precision=None: features)
+    return tts
+
+
+def test_checked_precision_is_applied_within_tolerance(checked_tts):
+    mode, result = checked_tts.set_checked_precision("int8", "문장", 0, max_mel_distance=10.0)
+    assert mode == "int8" and result["mode"] == "int8"
+    assert checked_tts.model.precision == "int8"
+
+
+def test_checked_precision_falls_back_to_fp32(checked_tts, caplog):
+    with caplog.at_level("WARNING", logger="app.melo_my.api"):
+        mode, result = checked_tts.set_checked_precision("int8", "문장", 0, max_mel_distance=0.0)
+    assert mode == "fp32"
+    assert result["mel_distance"] > 0.0
+    assert getattr(checked_tts.model, "precision", "fp32") == "fp32"
+    assert "staying on fp32" in caplog.records[0].getMessage()
@@ -0,0 +1,60 @@
+import torch
+
+from app.melo_my.feature_cache import EncoderOutputCache
+
+DETERMINISTIC = dict(noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0)
+
+
+def test_infer_returns_the_alignment_by_default(tiny_model, make_inputs):
+    args = make_inputs(20)
+    with torch.no_grad():
+        audio, attn, y_mask, _ = tiny_model.infer(*args, **DETERMINISTIC)
+        skipped = tiny_model.infer(*args, return_attn=False, **DETERMINISTIC)
+
+    # dense [b, 1, t', t] alignment; each phone's frames sum to its duration
+    assert attn.shape == (1, 1, y_mask.shape[-1], 20)
+    assert attn.sum().item() == y_mask.sum().item()
+    assert skipped[1] is None
+    assert torch.equal(skipped[0], audio)
+
+
+def test_render_of_encode_matches_infer(tiny_model, make_inputs):
+    args = make_inputs(30)
+    with torch.no_grad():
+        reference = tiny_model.infer(*args, length_scale=1.2, **DETERMINISTIC)
+        output = tiny_model.render(
+            tiny_model.encode(*args, noise_scale_w=0.0, sdp_ratio=0.0), noise_scale=0.0, length_scale=1.2
+        )
+    assert torch.equal(output[0], reference[0])
+    assert torch.equal(output[2], reference[2])
+
+
+def test_seeded_render_of_encode_matches_seeded_infer(tiny_model, make_inputs):
+    args = make_inputs(30)
+    sampling = dict(noise_scale=0.6, noise_scale_w=0.8, sdp_ratio=0.2)
+    with torch.no_grad():
+        reference = tiny_model.infer(*args, generator=torch.Generator().manual_seed(7), **sampling)[0]
+        generator = torch.Generator().manual_seed(7)
+        encoded = tiny_model.encode(*args, noise_scale_w=0.8, sdp_ratio=0.2, generator=generator)
+        output = tiny_model.render(encoded, noise_scale=0.6, generator=generator)[0]
+    assert torch.equal(output, reference)
+
+
+def test_seeded_encoder_cache_hit_is_bit_identical(tiny_model, make_inputs):
+    args = make_inputs(30)
+    cache = EncoderOutputCache(max_entries=4)
+    key = cache.key(args, 0, 0.2, 0.8, seed=7)
+    with torch.no_grad():
+        # miss: encode, keep the generator state after the SDP draw
+        generator = torch.Generator().manual_seed(7)
+        encoded = tiny_model.encode(*args, noise_scale_w=0.8, sdp_ratio=0.2, generator=generator)
+        cache.put(key, encoded, generator.get_state())
+        uncached = tiny_model.render(encoded, noise_scale=0.6, generator=generator)[0]
+
+        # hit: same seed, restored state, no encoder run
+        cached, state = cache.get(key)
+        generator = torch.Generator().manual_seed(7)
+        generator.set_state(state)
+        output = tiny_model.render(cached, noise_scale=0.6, generator=generator)[0]
+    assert torch.equal(output, uncached)
+    assert cache.stats()["hits"] == 1
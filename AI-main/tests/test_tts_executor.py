@@ -0,0 +1,61 @@
+import asyncio
+import gc
+
+import pytest
+
+from app.service.tts_executor import TTSExecutor, TTSQueueFullError
+
+
+def chunks(cancel_event):
+    for i in range(3):
+        yield bytes([i])
+
+
+def test_dropped_stream_releases_its_slot():
+    """순회하지 않고 버려진 스트림은 자리를 반납해야 함"""
+    executor = TTSExecutor(workers=1, max_queue=0)
+    try:
+        stream = executor.stream(chunks)
+        assert executor.stats()["active"] == 1
+        with pytest.raises(TTSQueueFullError):
+            executor.stream(chunks)
+
+        del stream
+        gc.collect()
+        assert executor.stats()["active"] == 0
+
+        # 반납된 자리로 다음 요청을 받을 수 있음
+        executor.stream(chunks)
+    finally:
+        executor.shutdown()
+
+
+def test_closed_stream_releases_its_slot():
+    executor = TTSExecutor(workers=1, max_queue=0)
+    try:
+        stream = executor.stream(chunks)
+        asyncio.run(stream.aclose())
+        assert executor.stats()["active"] == 0
+        assert executor.stats()["cancelled"] == 1
+
+        # 닫힌 뒤 순회해도 합성하지 않고 자리도 다시 반납하지 않음
+        async def collect():
+            return [chunk async for chunk in stream]
+
+        assert asyncio.run(collect()) == []
+        assert executor.stats()["active"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_consumed_stream_releases_its_slot():
+    executor = TTSExecutor(workers=1, max_queue=0)
+    try:
+        async def collect():
+            return [chunk async for chunk in executor.stream(chunks)]
+
+        assert asyncio.run(collect()) == [b"\x00", b"\x01", b"\x02"]
+        assert executor.stats()["active"] == 0
+        assert executor.stats()["completed"] == 1
+    finally:
+        executor.shutdown()
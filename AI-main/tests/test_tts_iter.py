@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import torch
+
+TEXT = (
+    "오늘은 아침부터 비가 내려서 우산을 챙겨 나갔습니다. "
+    "점심에는 시장에서 국수를 사 먹었는데 값이 조금 올랐더군요. "
+    "저녁에는 손주와 영상 통화를 하면서 하루 이야기를 나눴습니다."
+)
+
+
+def fake_features(t):
+    generator = torch.Generator().manual_seed(len(t))
+    length = 10 + len(t)
+    return (
+        None,
+        torch.randn(768, length, generator=generator),
+        torch.randint(1, 100, (length,), generator=generator),
+        torch.zeros(length, dtype=torch.long),
+        torch.full((length,), 3),
+    )
+
+
+@pytest.fixture
+def tts(make_tts):
+    """TTS whose front end records its calls (the G2P needs nltk data this test does not)."""
+    tts = make_tts()
+    tts.calls = []
+
+    def single(t):
+        tts.calls.append(("single", t))
+        return fake_features(t)
+
+    def batch(texts):
+        tts.calls.append(("batch", list(texts)))
+        return [fake_features(t) for t in texts]
+
+    tts._text_features = single
+    tts._text_features_batch = batch
+    yield tts
+    tts.disable_batching()
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_first_sentence_is_yielded_before_bert_runs_on_the_rest(tts, batching):
+    if batching:
+        tts.enable_batching(4)
+    sentences = tts.split_sentences_into_pieces(TEXT, tts.language, True)
+    assert len(sentences) == 3
+
+    chunks = tts.tts_iter(TEXT, 0, quiet=True, seed=3)
+    next(chunks)
+    assert tts.calls == [("single", sentences[0])]
+    rest = list(chunks)
+    assert tts.calls == [("single", sentences[0]), ("batch", sentences[1:])]
+    assert len(rest) == 2
+
+
+def test_matches_tts_to_file(tts):
+    streamed = np.concatenate(list(tts.tts_iter(TEXT, 0, quiet=True, seed=3)))
+    whole = tts.tts_to_file(TEXT, 0, output_path=None, quiet=True, seed=3)
+    assert np.allclose(streamed, whole)
@@ -0,0 +1,45 @@
+import threading
+
+from app.service.tts_warm_bank import WarmAudioBank
+
+
+def test_warm_stops_between_phrases():
+    """종료 신호가 오면 남은 문구를 합성하지 않음"""
+    stop = threading.Event()
+    rendered = []
+
+    def synthesize_pcm(text):
+        rendered.append(text)
+        if len(rendered) == 2:
+            stop.set()
+        return b"\x00\x00" * 10
+
+    bank = WarmAudioBank(synthesize_pcm, 44100)
+    bank.warm(["안녕하세요", "반갑습니다", "감사합니다"], stop_event=stop)
+
+    assert rendered == ["안녕하세요", "반갑습니다"]
+    assert not bank.ready
+    assert bank.get("안녕하세요") is not None
+
+
+def test_time_clips_are_zero_padded_and_joined_without_silence():
+    """시간 조각은 OFFLINE_TIME_FORMAT 과 같은 두 자리 표기로 합성하고, 이음새의 무음은 잘라냄"""
+    from datetime import datetime
+
+    from app.service.chat_bot_service import OFFLINE_TIME_FORMAT
+
+    voice, silence = b"\x01\x00" * 3, b"\x00\x00" * 4
+    rendered = []
+
+    def synthesize_pcm(text):
+        rendered.append(text)
+        return voice + silence
+
+    bank = WarmAudioBank(synthesize_pcm, 44100)
+    bank.warm([])
+    assert "09시" in rendered and "9시" not in rendered
+
+    now = datetime(datetime.now().year, 9, 5, 9, 7)
+    wav = bank.get(now.strftime(OFFLINE_TIME_FORMAT))
+    # prefix, 년, 월, 일, 시 는 끝 무음을 자르고 마지막 "분입니다" 만 무음 유지
+    assert wav is not None and wav.endswith(voice * 6 + silence)
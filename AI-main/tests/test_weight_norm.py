@@ -0,0 +1,42 @@
+import copy
+import os
+import pickle
+
+import torch
+from torch import nn
+from torch.nn.utils import parametrize
+
+
+def test_optimize_for_inference_folds_to_plain_modules(tiny_model, make_inputs):
+    args = make_inputs(30)
+    kwargs = dict(noise_scale=0.0, noise_scale_w=0.0, sdp_ratio=0.0)
+    with torch.no_grad():
+        reference = tiny_model.infer(*args, **kwargs)[0]
+        folded = tiny_model.optimize_for_inference()
+        output = folded.infer(*args, **kwargs)[0]
+
+    assert reference.shape == output.shape
+    assert (reference - output).abs().max().item() < 1e-5
+    assert not any(parametrize.is_parametrized(m) for m in folded.modules())
+    assert not any(isinstance(m, nn.Dropout) for m in folded.modules())
+    assert not any("parametrizations" in key for key in folded.state_dict())
+    # plain torch classes again, so isinstance / pickling / deepcopy work
+    assert all(type(layer) is nn.ConvTranspose1d for layer in folded.dec.ups)
+    assert isinstance(pickle.loads(pickle.dumps(folded.dec.conv_pre)), nn.Conv1d)
+    copy.deepcopy(folded)
+
+
+def test_prune_folded_checkpoints(tts_class, tmp_path):
+    ckpt = tmp_path / "checkpoint.pth"
+    ckpt.write_bytes(b"weights")
+    stale = [tmp_path / "checkpoint.folded-1-2.pt", tmp_path / "checkpoint.folded-3-4.pt"]
+    for path in stale:
+        path.write_bytes(b"old")
+    other = tmp_path / "other.folded-1-2.pt"
+    other.write_bytes(b"other checkpoint")
+
+    current = tts_class.folded_checkpoint_path(str(ckpt))
+    open(current, "wb").close()
+    tts_class.prune_folded_checkpoints(str(ckpt), keep=current)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(["checkpoint.pth", os.path.basename(current), other.name])